@@ -1,2 +1,15 @@
 from .bootcampspot import Bootcampspot
-from .errors import BCSError, CourseError, EnrollmentError
+from .aio import AsyncBootcampspot
+from .sweep import SweepResult
+from .cache import ResponseCache, MemoryCache, SqliteCache
+from .auth import TokenStore, MemoryTokenStore, FileTokenStore, KeyringTokenStore
+from .index import CourseIndex
+from .sync import Snapshot, Changes, IncrementalSync
+from .timeline import SessionIndex
+from .throttle import RateLimiter, TokenBucket
+from .records import GradeRecord, AttendanceRecord, SessionRecord
+from .archive import SnapshotCache
+from .feedback import FeedbackHistory
+from .registry import ClientRegistry
+from .prefetch import Prefetcher
+from .errors import BCSError, CourseError, EnrollmentError, SnapshotError
@@ -0,0 +1,175 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List
+
+from .bootcampspot import Bootcampspot
+from .sweep import ENDPOINTS, SweepResult, check_endpoints
+
+# Client attributes that never touch the network, everything else is a coroutine
+PASSTHROUGH = ('metrics', 'stats', 'cache', 'add_hook', 'remove_hook')
+
+
+class AsyncBootcampspot:
+    """Asyncio counterpart to Bootcampspot.
+
+    Wraps a Bootcampspot instance and exposes its API methods as coroutines,
+    along with the attributes that may have to log in first (``user``,
+    ``class_details`` and ``my_courses``).
+    Calls run on a dedicated thread pool sized to ``max_concurrency`` and
+    share the wrapped client's connection pool, so awaiting many of them at
+    once costs roughly one round-trip instead of one per call.
+
+    Args:
+        client (Bootcampspot): an authenticated client to wrap
+        max_concurrency (int): the most calls allowed in flight at once
+    """
+
+    def __init__(self, client: Bootcampspot, max_concurrency: int = 8):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.__semaphore = None
+
+    @classmethod
+    async def login(cls, email: str, password: str, max_concurrency: int = 8, **kwargs) -> 'AsyncBootcampspot':
+        """Logs in without blocking the event loop.
+
+        Keyword arguments are passed through to the Bootcampspot constructor.
+        The connection pool defaults to ``max_concurrency`` connections.
+        """
+        kwargs.setdefault('pool_size', max_concurrency)
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(None, partial(Bootcampspot, email, password, **kwargs))
+        return cls(client, max_concurrency=max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        '''Shut down the thread pool and the wrapped client.'''
+        self.__executor.shutdown(wait=False)
+        self.client.close()
+
+    def __getattr__(self, name):
+        # Only attributes that can't block the event loop come straight from the client
+        if name not in PASSTHROUGH:
+            raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+        return getattr(self.client, name)
+
+    @property
+    def course(self):
+        return self.client.course
+
+    @course.setter
+    def course(self, courseId: int):
+        self.client.course = courseId
+
+    @property
+    def enrollment(self):
+        return self.client.enrollment
+
+    @enrollment.setter
+    def enrollment(self, enrollmentId: int):
+        self.client.enrollment = enrollmentId
+
+    async def _attribute(self, name: str):
+        # Lazy clients log in on first access, so attributes are read off the loop too
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, getattr, self.client, name)
+
+    async def user(self) -> Dict:
+        """Coroutine version of :attr:`Bootcampspot.user`."""
+        return await self._attribute('user')
+
+    async def class_details(self) -> List[Dict]:
+        """Coroutine version of :attr:`Bootcampspot.class_details`."""
+        return await self._attribute('class_details')
+
+    async def my_courses(self) -> List[int]:
+        """Coroutine version of :attr:`Bootcampspot.my_courses`."""
+        return await self._attribute('my_courses')
+
+    async def _run(self, method: str, *args, **kwargs):
+        # The semaphore has to be made inside the running loop on older Pythons
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        async with self.__semaphore:
+            return await loop.run_in_executor(
+                self.__executor, partial(getattr(self.client, method), *args, **kwargs))
+
+    async def grades(self, course_id=None, milestones=False, return_null=False, output='dict') -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.grades`."""
+        return await self._run('grades', course_id=course_id, milestones=milestones,
+                               return_null=return_null, output=output)
+
+    async def sessions(self, course_id=None, enrollment_id=None, career_ok=False, orientation_ok=False,
+                       output='dict') -> List:
+        """Coroutine version of :meth:`Bootcampspot.sessions`."""
+        return await self._run('sessions', course_id=course_id, enrollment_id=enrollment_id,
+                               career_ok=career_ok, orientation_ok=orientation_ok, output=output)
+
+    async def attendance(self, course_id=None, by='student', output='dict') -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.attendance`."""
+        return await self._run('attendance', course_id=course_id, by=by, output=output)
+
+    async def session_details(self, session_id: int) -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.session_details`."""
+        return await self._run('session_details', session_id)
+
+    async def session_details_many(self, session_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Concurrent session details, see :meth:`Bootcampspot.session_details_many`."""
+        session_ids = list(dict.fromkeys(session_ids))
+        details = await asyncio.gather(*(self.session_details(session_id) for session_id in session_ids))
+        return dict(zip(session_ids, details))
+
+    async def session_closest(self, course_id=None) -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.session_closest`."""
+        return await self._run('session_closest', course_id=course_id)
+
+    async def session_at(self, time=None, course_id=None) -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.session_at`."""
+        return await self._run('session_at', time=time, course_id=course_id)
+
+    async def sessions_between(self, start, end, course_id=None) -> List:
+        """Coroutine version of :meth:`Bootcampspot.sessions_between`."""
+        return await self._run('sessions_between', start, end, course_id=course_id)
+
+    async def next_session(self, course_id=None, time=None) -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.next_session`."""
+        return await self._run('next_session', course_id=course_id, time=time)
+
+    async def feedback(self, course_id=None, output='dict') -> Dict:
+        """Coroutine version of :meth:`Bootcampspot.feedback`."""
+        return await self._run('feedback', course_id=course_id, output=output)
+
+    async def feedback_chapter(self) -> str:
+        """Coroutine version of :attr:`Bootcampspot.feedback_chapter`."""
+        return await self._attribute('feedback_chapter')
+
+    async def fetch_all(self, endpoints: Iterable[str] = ENDPOINTS, courses: Iterable[int] = None) -> SweepResult:
+        """Fetches every endpoint for every course concurrently.
+
+        Args:
+            endpoints (iterable): method names to call, defaults to grades, attendance, sessions and feedback
+            courses (iterable): courseIds to sweep, defaults to all of `my_courses`
+
+        Returns:
+            SweepResult: ``{courseId: {endpoint: result}}`` with failed calls collected in ``.errors``
+        """
+        endpoints = check_endpoints(endpoints)
+        courses = list(await self.my_courses() if courses is None else courses)
+        jobs = [(course_id, endpoint) for course_id in courses for endpoint in endpoints]
+
+        results = await asyncio.gather(
+            *(self._run(endpoint, course_id=course_id) for course_id, endpoint in jobs),
+            return_exceptions=True)
+
+        sweep = SweepResult()
+        for (course_id, endpoint), result in zip(jobs, results):
+            sweep.add(course_id, endpoint, result)
+        return sweep
@@ -0,0 +1,199 @@
+"""Per-student metrics over grades and attendance, computed with NumPy.
+
+Raw rows from the grades and attendance endpoints are encoded once into
+integer code arrays, without building intermediate dicts. Letter grades become indexes into ``GRADES`` and
+attendance becomes indexes into ``STATUSES``, with -1 for no value. Each
+student is keyed by ``(courseId, studentName)``. Averages, missing
+assignments, absence rates and at-risk flags are then a handful of array
+reductions over every course at once.
+
+Example:
+    >>> from bcs import analytics
+    >>> metrics = analytics.student_metrics({1234: grade_rows}, {1234: attendance_rows})
+    >>> metrics['student'][metrics['at_risk']]
+"""
+from itertools import repeat
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from . import tabular
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GRADES = ('A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F', 'Incomplete', 'Unsubmitted')
+GRADE_POINTS = (4.0, 4.0, 3.7, 3.3, 3.0, 2.7, 2.3, 2.0, 1.7, 1.0, 0.0, 0.0, 0.0)
+UNSUBMITTED = GRADES.index('Unsubmitted')
+
+STATUSES = ('present', 'remote', 'excused', 'absent')
+ABSENT = STATUSES.index('absent')
+
+OUTPUTS = ('columnar', 'records', 'dataframe', 'arrow')
+
+METRICS = ('course', 'student', 'average', 'graded', 'missing', 'sessions', 'absences', 'absence_rate', 'at_risk')
+
+_GRADE_CODES = {grade: code for code, grade in enumerate(GRADES)}
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+_FLAGS = {True: 1, False: 0}
+
+
+def _numpy():
+    if np is None:
+        raise ImportError("bcs.analytics requires numpy: pip install numpy")
+    return np
+
+
+def encode(values: Iterable, codes: Dict[str, int], count: int = -1):
+    '''Map values to int8 codes, -1 for None or anything not in codes'''
+    np = _numpy()
+    return np.fromiter(map(codes.get, values, repeat(-1)), dtype=np.int8, count=count)
+
+
+def factorize(values: List) -> Tuple:
+    '''Returns ``(uniques, codes)`` with uniques in order of first appearance'''
+    np = _numpy()
+    lookup = dict.fromkeys(values)
+    for code, value in enumerate(lookup):
+        lookup[value] = code
+    return list(lookup), np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=len(values))
+
+
+class _Students:
+    # Assigns each (course, student) pair a dense integer id on first sight
+
+    def __init__(self):
+        self.ids = {}
+
+    def encode(self, course_id: int, names: List[str]):
+        names, codes = factorize(names)
+        ids = self.ids
+        known = np.array([ids.setdefault((course_id, name), len(ids)) for name in names], dtype=np.int64)
+        return known[codes]
+
+
+def _by_course(rows) -> Mapping:
+    # A single course's rows are accepted as-is and keyed under None
+    return rows if isinstance(rows, Mapping) else {None: rows}
+
+
+def _column(rows: List[Dict], name: str) -> List:
+    return list(map(itemgetter(name), rows))
+
+
+def encode_grades(grades: Mapping[int, List[Dict]], students: _Students = None,
+                  milestones: bool = False) -> Tuple:
+    """Encodes raw grades rows into student ids and grade codes.
+
+    Args:
+        grades (dict): ``{courseId: rows from the grades endpoint}``
+        milestones (bool): keep assignments with 'Milestone' in the title
+
+    Returns:
+        tuple: ``(student ids, grade codes)`` as equal length arrays
+    """
+    np = _numpy()
+    students = students or _Students()
+    ids, codes = [], []
+    for course_id, rows in _by_course(grades).items():
+        course_ids = students.encode(course_id, _column(rows, 'studentName'))
+        course_codes = encode(_column(rows, 'grade'), _GRADE_CODES, len(rows))
+        if not milestones:
+            titles, title_codes = factorize(_column(rows, 'assignmentTitle'))
+            keep = ~np.array(['Milestone' in title for title in titles], dtype=bool)[title_codes]
+            course_ids, course_codes = course_ids[keep], course_codes[keep]
+        ids.append(course_ids)
+        codes.append(course_codes)
+    return (np.concatenate(ids) if ids else np.empty(0, np.int64),
+            np.concatenate(codes) if codes else np.empty(0, np.int8))
+
+
+def attendance_codes(rows: List[Dict]):
+    '''Vectorized `tabular.attendance_status` for raw attendance rows, as codes into ``STATUSES``'''
+    np = _numpy()
+    present, remote, excused = (encode(_column(rows, name), _FLAGS, len(rows))
+                                for name in ('present', 'remote', 'excused'))
+    return np.select([(present == 1) & (remote == 0), remote == 1, excused == 1, (present == 0) & (excused == 0)],
+                     [_STATUS_CODES[status] for status in STATUSES], -1).astype(np.int8)
+
+
+def encode_attendance(attendance: Mapping[int, List[Dict]], students: _Students = None) -> Tuple:
+    """Encodes raw attendance rows into student ids and status codes.
+
+    Args:
+        attendance (dict): ``{courseId: rows from the attendance endpoint}``
+
+    Returns:
+        tuple: ``(student ids, status codes)`` as equal length arrays
+    """
+    np = _numpy()
+    students = students or _Students()
+    ids, codes = [], []
+    for course_id, rows in _by_course(attendance).items():
+        ids.append(students.encode(course_id, _column(rows, 'studentName')))
+        codes.append(attendance_codes(rows))
+    return (np.concatenate(ids) if ids else np.empty(0, np.int64),
+            np.concatenate(codes) if codes else np.empty(0, np.int8))
+
+
+def student_metrics(grades: Mapping[int, List[Dict]] = None, attendance: Mapping[int, List[Dict]] = None,
+                    milestones: bool = False, min_average: float = 2.0, max_missing: int = 1,
+                    max_absence_rate: float = 0.1, output: str = 'columnar'):
+    """Computes per-student grade and attendance metrics across courses.
+
+    Grades count on a 4.0 scale, with Incomplete and Unsubmitted as 0. A
+    student is at risk when their average is below `min_average`, they have
+    more than `max_missing` unsubmitted assignments, or they missed more
+    than `max_absence_rate` of their recorded sessions. Students with no
+    graded work or no recorded sessions have a NaN average or absence rate,
+    which never flags them.
+
+    Args:
+        grades (dict): ``{courseId: rows from the grades endpoint}``, or one course's rows
+        attendance (dict): ``{courseId: rows from the attendance endpoint}``, or one course's rows
+        milestones (bool): count assignments with 'Milestone' in the title
+        min_average (float): lowest average grade not flagged
+        max_missing (int): most unsubmitted assignments not flagged
+        max_absence_rate (float): highest share of recorded sessions missed not flagged
+        output (str): 'columnar' for NumPy arrays, or 'records', 'dataframe' or 'arrow'
+
+    Returns:
+        dict: one entry per student keyed by ``METRICS``
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Invalid output: {output}. Try one of these: {list(OUTPUTS)}")
+    np = _numpy()
+    students = _Students()
+    grade_ids, grade_codes = encode_grades(grades or {}, students, milestones=milestones)
+    attendance_ids, status_codes = encode_attendance(attendance or {}, students)
+    n = len(students.ids)
+
+    points = np.asarray(GRADE_POINTS)[grade_codes]
+    graded = grade_codes >= 0
+    graded_count = np.bincount(grade_ids, weights=graded, minlength=n)
+    point_total = np.bincount(grade_ids, weights=np.where(graded, points, 0.0), minlength=n)
+    missing = np.bincount(grade_ids, weights=grade_codes == UNSUBMITTED, minlength=n).astype(np.int64)
+
+    recorded = np.bincount(attendance_ids, weights=status_codes >= 0, minlength=n)
+    absences = np.bincount(attendance_ids, weights=status_codes == ABSENT, minlength=n).astype(np.int64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = point_total / graded_count
+        absence_rate = absences / recorded
+
+    at_risk = (average < min_average) | (missing > max_missing) | (absence_rate > max_absence_rate)
+
+    keys = list(students.ids)
+    metrics = {'course': np.array([course_id for course_id, _ in keys], dtype=object),
+               'student': np.array([name for _, name in keys], dtype=object),
+               'average': average,
+               'graded': graded_count.astype(np.int64),
+               'missing': missing,
+               'sessions': recorded.astype(np.int64),
+               'absences': absences,
+               'absence_rate': absence_rate,
+               'at_risk': at_risk}
+    if output == 'columnar':
+        return metrics
+    return tabular.convert({name: column.tolist() for name, column in metrics.items()}, output)
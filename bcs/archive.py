@@ -0,0 +1,212 @@
+"""Offline snapshots of Bootcampspot responses.
+
+A snapshot file holds the `/me` payload and raw endpoint responses in a
+columnar, memory-mapped layout::
+
+    magic (8 bytes) | header length (8 bytes, little endian) | JSON header | segments
+
+Responses that are lists of flat rows (grades, attendance) are stored column
+by column. Strings are dictionary-encoded into int32 codes, booleans are
+stored as int8 and integers as int64, with -1 standing for None in codes and
+booleans. Anything else is stored as a JSON segment. Opening a snapshot only
+parses the header. Each response is decoded straight from the mapped file
+the first time it's asked for.
+"""
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+
+from .cache import MISS, ResponseCache
+from .errors import SnapshotError
+
+MAGIC = b'BCSSNAP1'
+ALIGN = 8
+
+
+class _Writer:
+
+    def __init__(self):
+        self.segments = []
+        self.size = 0
+
+    def add(self, data: bytes) -> List[int]:
+        pad = -self.size % ALIGN
+        if pad:
+            self.segments.append(b'\0' * pad)
+            self.size += pad
+        offset = self.size
+        self.segments.append(data)
+        self.size += len(data)
+        return [offset, len(data)]
+
+
+def _column(writer: _Writer, name: str, values: List) -> Dict:
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, bool) for value in present):
+        codes = array('b', (-1 if value is None else int(value) for value in values))
+        return {'name': name, 'type': 'bool', 'codes': writer.add(codes.tobytes())}
+    if present and len(present) == len(values) and all(
+            isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return {'name': name, 'type': 'int', 'codes': writer.add(array('q', values).tobytes())}
+    if all(isinstance(value, str) for value in present):
+        lookup = {}
+        codes = array('i', (-1 if value is None else lookup.setdefault(value, len(lookup))
+                            for value in values))
+        return {'name': name, 'type': 'dict', 'codes': writer.add(codes.tobytes()),
+                'values': writer.add(json.dumps(list(lookup)).encode())}
+    return {'name': name, 'type': 'json', 'values': writer.add(json.dumps(values).encode())}
+
+
+def _is_table(payload) -> bool:
+    return (isinstance(payload, list) and len(payload) > 0 and all(isinstance(row, dict) for row in payload)
+            and all(not isinstance(value, (dict, list)) for row in payload for value in row.values()))
+
+
+def write_snapshot(path: str, me: Dict, responses: Iterable[Tuple[str, Dict, object]]):
+    """Writes raw responses to a snapshot file.
+
+    Args:
+        path (str): file to write
+        me (dict): the `/me` payload
+        responses (iterable): ``(endpoint, body, payload)`` for every response to keep
+    """
+    writer = _Writer()
+    entries = []
+    for endpoint, body, payload in responses:
+        entry = {'endpoint': endpoint, 'body': body}
+        if _is_table(payload):
+            names = list(dict.fromkeys(name for row in payload for name in row))
+            entry['rows'] = len(payload)
+            entry['columns'] = [_column(writer, name, [row.get(name) for row in payload]) for name in names]
+        else:
+            entry['json'] = writer.add(json.dumps(payload).encode())
+        entries.append(entry)
+
+    header = json.dumps({'version': 1, 'created': time.time(), 'byteorder': sys.byteorder,
+                         'me': me, 'responses': entries}).encode()
+    start = len(MAGIC) + 8 + len(header)
+    start_pad = -start % ALIGN
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header) + start_pad))
+        f.write(header + b' ' * start_pad)
+        for segment in writer.segments:
+            f.write(segment)
+
+
+class SnapshotCache(ResponseCache):
+    """Read-only response cache backed by a memory-mapped snapshot file.
+
+    Never expires, ignores writes and namespaces. Responses are decoded from
+    the mapped file on first use and kept.
+
+    Args:
+        path (str): a file written by :func:`write_snapshot`
+
+    Attributes:
+        me (dict): the `/me` payload at the time of the snapshot
+        created (float): epoch seconds the snapshot was written
+    """
+
+    def __init__(self, path: str):
+        super().__init__(ttl=None, maxsize=float('inf'))
+        self.path = path
+        with open(path, 'rb') as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if not self.__map[:len(MAGIC)] == MAGIC:
+            raise SnapshotError(f"Invalid snapshot: {path} is not a Bootcampspot snapshot")
+        length, = struct.unpack('<Q', self.__map[len(MAGIC):len(MAGIC) + 8])
+        self.__base = len(MAGIC) + 8 + length
+        header = json.loads(bytes(self.__map[len(MAGIC) + 8:self.__base]))
+        self.me = header['me']
+        self.created = header['created']
+        self.__swap = not header['byteorder'] == sys.byteorder
+        self.__entries = {self.key(entry['endpoint'], entry['body']): entry for entry in header['responses']}
+        self.__decoded = {}
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @staticmethod
+    def key(endpoint: str, body: dict, namespace: str = None) -> str:
+        # A snapshot holds one account's responses, whichever client replays them
+        return ResponseCache.key(endpoint, body)
+
+    def close(self):
+        self.__decoded.clear()
+        self.__map.close()
+
+    def __segment(self, offset_length) -> memoryview:
+        offset, length = offset_length
+        return memoryview(self.__map)[self.__base + offset:self.__base + offset + length]
+
+    def __codes(self, segment, typecode: str):
+        if self.__swap:
+            values = array(typecode)
+            values.frombytes(segment)
+            values.byteswap()
+            return values
+        return segment.cast(typecode)
+
+    def __decode_column(self, column: Dict) -> List:
+        kind = column['type']
+        if kind == 'json':
+            return json.loads(bytes(self.__segment(column['values'])))
+        if kind == 'int':
+            return self.__codes(self.__segment(column['codes']), 'q').tolist()
+        if kind == 'bool':
+            return [None if code < 0 else bool(code) for code in self.__segment(column['codes']).cast('b')]
+        lookup = json.loads(bytes(self.__segment(column['values'])))
+        return [None if code < 0 else lookup[code] for code in self.__codes(self.__segment(column['codes']), 'i')]
+
+    def __decode(self, entry: Dict):
+        if 'json' in entry:
+            return json.loads(bytes(self.__segment(entry['json'])))
+        names = [column['name'] for column in entry['columns']]
+        columns = [self.__decode_column(column) for column in entry['columns']]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def _get(self, key, now):
+        value = self.__decoded.get(key, MISS)
+        if value is MISS and key in self.__entries:
+            value = self.__decoded[key] = self.__decode(self.__entries[key])
+        return value
+
+    def _stored(self, key, now):
+        return self.created if key in self.__entries else MISS
+
+    def _set(self, key, endpoint, body, value, expires):
+        pass
+
+    def _delete(self, key):
+        pass
+
+    def _entries(self):
+        return [(key, entry['endpoint'], entry['body']) for key, entry in self.__entries.items()]
+
+    def clear(self):
+        pass
+
+
+class OfflineAdapter(BaseAdapter):
+    """Transport adapter that refuses to send anything, for snapshot-backed clients."""
+
+    def send(self, request, **kwargs):
+        raise SnapshotError(f"Not in snapshot: {request.method} {request.url} {request.body or ''}".rstrip())
+
+    def close(self):
+        pass
+
+
+def offline_session() -> requests.Session:
+    session = requests.Session()
+    session.mount('https://', OfflineAdapter())
+    session.mount('http://', OfflineAdapter())
+    return session
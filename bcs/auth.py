@@ -0,0 +1,162 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .transport import BCS_ROOT
+
+# PBKDF2 rounds for the password check kept with each token
+ITERATIONS = 20000
+
+
+def _digest(password: str, salt: bytes) -> str:
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, ITERATIONS).hex()
+
+
+class TokenStore:
+    """Base class for persisted auth tokens.
+
+    Stores the ``authToken`` from `/login` together with the `/me` payload for
+    each email and API root, so a new Bootcampspot instance can skip both
+    calls while the token is still fresh. A token the API rejects is replaced
+    transparently. Passwords are never stored, only a salted hash that a
+    later `load` must match before the token is handed out.
+    Subclasses only provide ``_read``, ``_write`` and ``_remove``.
+
+    Args:
+        max_age (float): seconds a stored token is trusted, ``None`` trusts it until the API rejects it
+    """
+
+    def __init__(self, max_age: float = 12 * 60 * 60):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(email: str, bcs_root: str = BCS_ROOT) -> str:
+        return f"{email.lower()} {bcs_root.rstrip('/')}"
+
+    def load(self, email: str, password: str, bcs_root: str = BCS_ROOT) -> Optional[Dict]:
+        """Returns ``{'authToken', 'me', 'saved'}`` for email, or None if missing, stale or the password differs."""
+        with self._lock:
+            entry = self._read(self.key(email, bcs_root))
+        if not entry or not entry.get('authToken') or not entry.get('salt'):
+            return None
+        if self.max_age is not None and time.time() - entry.get('saved', 0) > self.max_age:
+            return None
+        if not hmac.compare_digest(entry.get('digest', ''), _digest(password, bytes.fromhex(entry['salt']))):
+            return None
+        return entry
+
+    def save(self, email: str, password: str, token: str, me: Dict = None, bcs_root: str = BCS_ROOT):
+        salt = os.urandom(16)
+        entry = {'authToken': token, 'me': me, 'saved': time.time(),
+                 'salt': salt.hex(), 'digest': _digest(password, salt)}
+        with self._lock:
+            self._write(self.key(email, bcs_root), entry)
+
+    def clear(self, email: str, bcs_root: str = BCS_ROOT):
+        with self._lock:
+            self._remove(self.key(email, bcs_root))
+
+    def _read(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def _write(self, key: str, entry: Dict):
+        raise NotImplementedError
+
+    def _remove(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryTokenStore(TokenStore):
+    """Keeps tokens for the life of the process."""
+
+    def __init__(self, max_age: float = 12 * 60 * 60):
+        super().__init__(max_age=max_age)
+        self.__entries = {}
+
+    def _read(self, key):
+        return self.__entries.get(key)
+
+    def _write(self, key, entry):
+        self.__entries[key] = entry
+
+    def _remove(self, key):
+        self.__entries.pop(key, None)
+
+
+class FileTokenStore(TokenStore):
+    """Keeps tokens in a JSON file readable only by the current user.
+
+    Args:
+        path (str): file to keep tokens in, defaults to ``~/.bcs/tokens.json``
+    """
+
+    def __init__(self, path: str = None, max_age: float = 12 * 60 * 60):
+        super().__init__(max_age=max_age)
+        self.path = os.path.expanduser(path or os.path.join('~', '.bcs', 'tokens.json'))
+
+    def __load(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __dump(self, entries: Dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp, self.path)
+
+    def _read(self, key):
+        return self.__load().get(key)
+
+    def _write(self, key, entry):
+        entries = self.__load()
+        entries[key] = entry
+        self.__dump(entries)
+
+    def _remove(self, key):
+        entries = self.__load()
+        if entries.pop(key, None) is not None:
+            self.__dump(entries)
+
+
+class KeyringTokenStore(TokenStore):
+    """Keeps tokens in the system keyring.
+
+    Requires the optional `keyring` package.
+
+    Args:
+        service (str): keyring service name the tokens are filed under
+    """
+
+    def __init__(self, service: str = 'bcs-python', max_age: float = 12 * 60 * 60):
+        super().__init__(max_age=max_age)
+        try:
+            import keyring
+        except ImportError:
+            raise ImportError(
+                "KeyringTokenStore requires the keyring package: pip install keyring")
+        self.__keyring = keyring
+        self.service = service
+
+    def _read(self, key):
+        value = self.__keyring.get_password(self.service, key)
+        return json.loads(value) if value else None
+
+    def _write(self, key, entry):
+        self.__keyring.set_password(self.service, key, json.dumps(entry))
+
+    def _remove(self, key):
+        try:
+            self.__keyring.delete_password(self.service, key)
+        except self.__keyring.errors.PasswordDeleteError:
+            pass
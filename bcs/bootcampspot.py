@@ -1,46 +1,236 @@
+import hashlib
 import json
 import os
+import threading
+import time
+from time import perf_counter
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional
 import requests
 from io import StringIO
-from .errors import CourseError, EnrollmentError
+from .archive import SnapshotCache, offline_session, write_snapshot
+from .auth import MemoryTokenStore, TokenStore
+from .cache import MemoryCache, ResponseCache
+from .errors import BCSError, CourseError, EnrollmentError, SnapshotError
+from .feedback import OUTPUTS as FEEDBACK_OUTPUTS, FeedbackEngine, to_dict
+from .index import CourseIndex
+from .records import AttendanceRecord, GradeRecord, session_record
+from .metrics import Metrics, timed_transform
+from .throttle import RateLimiter, SingleFlight
+from . import analytics, tabular
+from .stream import iter_items, walk
+from .timeline import SessionIndex, epoch
+from .sync import CELL_COLUMNS, Changes, Snapshot, diff
+from .prefetch import PREFETCH, Prefetcher
+from .sweep import ENDPOINTS, SWEEPABLE, SweepResult, _fan_out, check_endpoints
+from .transport import BCS_ROOT, build_session
+
+# Most ended-session details a client without a cache keeps
+PAST_DETAILS = 1024
 
 
 class Bootcampspot:
 
-    def __init__(self, email: str, password: str):
-        '''Get Auth and call `/me` endpoint for course info.'''
+    def __init__(self, email: str, password: str, bcs_root: str = BCS_ROOT,
+                 session: requests.Session = None, pool_size: int = 10,
+                 timeout: float = 30, retries: int = 3, backoff_factor: float = 0.5,
+                 cache: ResponseCache = None, token_store: TokenStore = None, lazy: bool = False,
+                 rate_limiter: RateLimiter = None, coalesce: bool = True, sessions_ttl: float = 300):
+        '''Get Auth and call `/me` endpoint for course info.
+
+        All calls share one pooled, keep-alive session. Requests answered with
+        a 429 or 5xx are retried with exponential backoff.
+
+        With a `token_store`, a still-fresh token from an earlier login with
+        the same email, password and `bcs_root` is reused without logging in,
+        along with its `/me` payload once one has been fetched. Whenever the API
+        answers 401 the client logs in again and retries once.
+
+        With `lazy`, nothing is fetched up front. Login happens on the first
+        call, and `user`, `class_details` and the id lists are built on first
+        access. An explicit course or enrollment id is then passed through
+        unchecked unless checking it is needed to resolve the other id.
+
+        Args:
+            email (str): Bootcampspot login email
+            password (str): Bootcampspot login password
+            bcs_root (str): API root, override to point at a local stub server
+            session (requests.Session): an existing session to share, skips building one
+            pool_size (int): connections kept alive per host
+            timeout (float): seconds to wait on connect and on each read
+            retries (int): retries on connection errors, 429 and 5xx responses
+            backoff_factor (float): base of the exponential sleep between retries
+            cache (ResponseCache): serve repeat calls from this cache, see :mod:`bcs.cache`. Responses are
+                namespaced by `email` and `bcs_root`, so one cache can be shared by several clients
+            token_store (TokenStore): reuse auth tokens across instances, see :mod:`bcs.auth`
+            lazy (bool): defer login and `/me` until they are first needed
+            rate_limiter (RateLimiter): per-endpoint token buckets every API call waits on, see :mod:`bcs.throttle`
+            coalesce (bool): share one in-flight request between concurrent identical calls
+            sessions_ttl (float): seconds a course's session index is reused without a cache, forever if None
+        '''
 
         self.__creds = {"email": email,
                         "password": password}
 
-        self.__bcs_root = "https://bootcampspot.com/api/instructor/v1"
-        self.__login = requests.post(
-            f"{self.__bcs_root}/login", json=self.__creds)
-        self.__auth = self.__login.json()['authenticationInfo']['authToken']
+        self.__bcs_root = bcs_root.rstrip('/')
+        self.__timeout = timeout
+        self.__pool_size = pool_size
+        self.__cache = cache
+        # Keeps this account's responses apart from others' in a shared cache
+        self.__namespace = hashlib.sha256(f"{email}\n{self.__bcs_root}".encode()).hexdigest()[:16]
+        self.__token_store = token_store
+        self.__rate_limiter = rate_limiter
+        self.__flights = SingleFlight() if coalesce else None
+        self.__auth_lock = threading.Lock()
+        self.__me_lock = threading.Lock()
+        self.__owns_session = session is None
+        self.__session = session if session is not None else build_session(
+            pool_size=pool_size, retries=retries, backoff_factor=backoff_factor)
+
+        self.__login = None
+        self.__auth = None
+        self.__me = None
+        self.__details = None
+        stored = token_store.load(email, password, self.__bcs_root) if token_store is not None else None
+        if stored is not None:
+            # A lazy client may have stored its token before ever fetching `/me`
+            self.__set_token(stored['authToken'])
+            self.__me = stored.get('me')
+            if self.__me is None and not lazy:
+                self.__fetch_me()
+        elif not lazy:
+            self.__authenticate()
+            # Get relevent values
+            self.__fetch_me()
+
+        self.__course = None
+        self.__enrollment = None
+        self.__session_indexes = {}
+        self.__sessions_ttl = sessions_ttl
+        # Details of ended sessions never change. They're kept without expiry in the cache, or
+        # without one in a bounded store of their own
+        self.__past_details = MemoryCache(ttl=None, maxsize=PAST_DETAILS) if cache is None else None
+        self.__feedback = FeedbackEngine()
+        self.__hooks = {'pre_request': [], 'post_request': []}
+        self.__prefetchers = []
+        self.metrics = Metrics()
+
+    def __fetch_me(self) -> Dict:
+        # Double-checked so concurrent first accesses share one `/me` call
+        if self.__me is None:
+            with self.__me_lock:
+                if self.__me is None:
+                    self.__me = self.__request('GET', 'me').json()
+                    self.__store_token()
+        return self.__me
+
+    def __derive(self) -> Dict:
+        if self.__details is None:
+            me = self.__fetch_me()
+            class_details = [{'courseName': enrollment['course']['name'], 'courseId': enrollment['courseId'], 'enrollmentId': enrollment['id']}
+                             for enrollment in me['Enrollments']]
+            self.__details = {
+                'class_details': class_details,
+                'index': CourseIndex(class_details),
+                'my_courses': [course['courseId'] for course in class_details],
+                'my_enrollments': [course['enrollmentId'] for course in class_details],
+                'my_cohorts': [course['courseName'] for course in class_details]
+            }
+        return self.__details
+
+    @property
+    def index(self) -> CourseIndex:
+        return self.__derive()['index']
+
+    def lookup(self, course: int = None, enrollment: int = None, cohort: str = None) -> List[Dict]:
+        """Finds your `class_details` records matching every id given.
+
+        Args:
+            course (int): a courseId
+            enrollment (int): an enrollmentId
+            cohort (str): a cohort/course name
+
+        Returns:
+            list: matching records, all of them if no id is given
+
+        Raises:
+            CourseError: the courseId or cohort is unknown, or doesn't match the other ids
+            EnrollmentError: the enrollmentId is unknown
+        """
+        return self.index.lookup(course=course, enrollment=enrollment, cohort=cohort)
+
+    @property
+    def user(self) -> Dict:
+        return self.__fetch_me()['userInfo']
+
+    @property
+    def class_details(self) -> List[Dict]:
+        return self.__derive()['class_details']
+
+    @property
+    def my_courses(self) -> List[int]:
+        return self.__derive()['my_courses']
+
+    @property
+    def my_enrollments(self) -> List[int]:
+        return self.__derive()['my_enrollments']
+
+    @property
+    def my_cohorts(self) -> List[str]:
+        return self.__derive()['my_cohorts']
+
+    def __set_token(self, token: str):
+        self.__auth = token
         self.__head = {
             'Content-Type': 'application/json',
             'authToken': self.__auth
         }
-        # Get relevent values
-        self.__me = requests.get(
-            self.__bcs_root + "/me", headers=self.__head).json()
-        self.user = self.__me['userInfo']
-
-        self.class_details = [{'courseName': enrollment['course']['name'], 'courseId': enrollment['courseId'], 'enrollmentId': enrollment['id']}
-                              for enrollment in self.__me['Enrollments']]
-        self.my_courses = [course['courseId']
-                           for course in self.class_details]
 
-        self.my_enrollments = [course['enrollmentId']
-                               for course in self.class_details]
-
-        self.my_cohorts = [course['courseName']
-                           for course in self.class_details]
-
-        self.__course = None
-        self.__enrollment = None
+    def __authenticate(self):
+        self.__login = self.__session.post(
+            f"{self.__bcs_root}/login", json=self.__creds, timeout=self.__timeout)
+        info = self.__login.json().get('authenticationInfo') if self.__login.status_code == 200 else None
+        if not info:
+            raise BCSError(f"Login failed for {self.__creds['email']}")
+        self.__set_token(info['authToken'])
+        self.__store_token()
+
+    def __store_token(self):
+        if self.__token_store is not None:
+            self.__token_store.save(self.__creds['email'], self.__creds['password'], self.__auth, self.__me,
+                                    self.__bcs_root)
+
+    def __request(self, method: str, endpoint: str, body: dict = None, stream: bool = False) -> requests.Response:
+        '''Send a request, logging in again once if the token was rejected'''
+        if self.__auth is None:
+            with self.__auth_lock:
+                if self.__auth is None:
+                    self.__authenticate()
+        token = self.__auth
+        response = self.__session.request(method, f"{self.__bcs_root}/{endpoint}", headers=self.__head,
+                                          json=body, timeout=self.__timeout, stream=stream)
+        if response.status_code == 401:
+            response.close()
+            with self.__auth_lock:
+                # Another thread may have already refreshed the token
+                if self.__auth == token:
+                    self.__authenticate()
+            response = self.__session.request(method, f"{self.__bcs_root}/{endpoint}", headers=self.__head,
+                                              json=body, timeout=self.__timeout, stream=stream)
+        return response
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        '''Stop prefetching and release pooled connections if this instance built the session.'''
+        for prefetcher in self.__prefetchers:
+            prefetcher.stop()
+        if self.__owns_session:
+            self.__session.close()
 
     def __repr__(self):
         '''Return course details on print'''
@@ -81,17 +271,13 @@ class Bootcampspot:
 
     @enrollment.setter
     def enrollment(self, enrollmentId: int):
-        if enrollmentId not in self.my_enrollments:
-            msg = f'Invalid enrollmentId: {enrollmentId} not in your enrollments. Try one of these: {self.my_enrollments}'
-            raise EnrollmentError(msg)
-        elif not self._course == None:
-            enroll_match = [
-                enrollment for enrollment in self.class_details if course['courseId'] == self.__course][0]
+        self.index.enrollment(enrollmentId)
+        if not self.__course == None:
+            enroll_match = self.index.course(self.__course)
             if not enrollmentId == enroll_match['enrollmentId']:
-                msg = f"Invalid courseId: {enrollmentId} did not match enrollmentId for set courseId. Did you mean {enroll_match['enrollmentId']}"
+                msg = f"Invalid enrollmentId: {enrollmentId} did not match enrollmentId for set courseId. Did you mean {enroll_match['enrollmentId']}"
                 raise EnrollmentError(msg)
-        else:
-            self.__enrollment = enrollmentId
+        self.__enrollment = enrollmentId
 
     @property
     def course(self):
@@ -99,52 +285,189 @@ class Bootcampspot:
 
     @course.setter
     def course(self, courseId=int):
-        if courseId not in self.my_courses:
-            msg = f'Invalid courseId: {courseId} not in your courses. Try one of these: {self.my_courses}'
-            raise CourseError(msg)
-        elif not self.__enrollment == None:
-            course_match = [
-                course for course in self.class_details if course['enrollmentId'] == self.__enrollment][0]
-            if not courseId == course_match['courseId']:
-                msg = f"Invalid courseId: {courseId} did not match courseId for set enrollmentId. Did you mean {course_match['courseId']}"
+        course_match = self.index.course(courseId)
+        # An enrollment set on its own constrains the course, one set through a course doesn't
+        if self.__course == None and not self.__enrollment == None:
+            if not course_match['enrollmentId'] == self.__enrollment:
+                valid = [course['courseId'] for course in self.index.enrollment(self.__enrollment)]
+                msg = f"Invalid courseId: {courseId} did not match courseId for set enrollmentId. Did you mean one of {valid}"
                 raise CourseError(msg)
-        else:
-            self.__course = courseId
-            self.__enrollment = [course['enrollmentId']
-                                 for course in self.class_details if course['courseId'] == self.__course][0]
+        self.__course = courseId
+        self.__enrollment = course_match['enrollmentId']
 
-    def __course_check(self, course):
+    def __course_check(self, course, need_enrollment=True):
         # Set courseId if not set
         if not course == None:
-            if course not in self.my_courses:
-                msg = f'Invalid courseId: {course} not in your courses. Try one of these: {self.my_courses}'
-                raise CourseError(msg)
-            else:
-                enroll_match = [course['enrollmentId']
-                                for course in self.class_details if course['courseId'] == self.__course][0]
-                return course, enroll_match
+            if self.__me is None and not need_enrollment:
+                # Lazy and not loaded yet, the API will reject a bad courseId
+                return course, None
+            return course, self.index.course(course)['enrollmentId']
         else:
             return self.__course, self.__enrollment
 
     def __enrollment_check(self, enrollment):
         # Set enrollmentId if not set
         if not enrollment == None:
-            if enrollment not in self.my_enrollments:
-                msg = f"Invalid enrollmentId: {enrollment} not in your enrollments. Try one of these: {self.my_enrollments}"
-                raise EnrollmentError(msg)
-            else:
+            if self.__me is None:
                 return enrollment
+            self.index.enrollment(enrollment)
+            return enrollment
         else:
             return self.__enrollment
 
-    def __call(self, endpoint=str, body=dict):
-        '''Grab response from endpoint'''
-        response = requests.post(
-            f"{self.__bcs_root}/{endpoint}", headers=self.__head, json=body)
-        if response.status_code == 200:
-            return response.json()
+    @property
+    def cache(self) -> ResponseCache:
+        return self.__cache
+
+    def invalidate(self, endpoint: str = None, body: dict = None, where=None) -> int:
+        """Drops cached responses so the next call goes to the API.
+
+        See :meth:`bcs.cache.ResponseCache.invalidate` for the arguments.
+
+        Returns:
+            int: the number of responses dropped
+        """
+        if endpoint in (None, 'sessions'):
+            self.__session_indexes.clear()
+        if self.__cache is None:
+            if endpoint in (None, 'sessionDetail'):
+                return self.__past_details.invalidate(endpoint=endpoint, body=body, where=where)
+            return 0
+        return self.__cache.invalidate(endpoint=endpoint, body=body, where=where, namespace=self.__namespace)
+
+    def add_hook(self, event: str, hook):
+        """Registers a function to run around every API request.
+
+        ``pre_request`` hooks are called as ``hook(endpoint, body)`` before a
+        request is sent. ``post_request`` hooks are called as
+        ``hook(endpoint, body, response, timings)`` once it's back, with
+        timings in seconds keyed by phase, or with `response` None and no
+        timings if the request failed without one. Streamed responses call
+        them once the body has been read. Calls answered from the cache don't
+        trigger hooks.
 
-    def grades(self, course_id=None, milestones=False, return_null=False) -> Dict:
+        Args:
+            event (str): 'pre_request' or 'post_request'
+            hook (callable): the function to call
+        """
+        if event not in self.__hooks:
+            raise ValueError(f"Invalid event: {event}. Try one of these: {list(self.__hooks)}")
+        self.__hooks[event].append(hook)
+
+    def remove_hook(self, event: str, hook):
+        self.__hooks[event].remove(hook)
+
+    def stats(self, format: str = 'dict'):
+        """Returns request counters and timers per endpoint.
+
+        Counters are requests, errors, bytes, cache_hits and cache_misses,
+        plus responses by status. Timers cover the ttfb (time to first byte),
+        transfer, decode and transform phases of each call.
+
+        Args:
+            format (str): 'dict', or 'prometheus' for the text exposition format
+
+        Returns:
+            dict: ``{endpoint: {counter: n, 'status': {...}, 'timers': {phase: {...}}}}``
+        """
+        if format == 'prometheus':
+            return self.metrics.to_prometheus()
+        return self.metrics.snapshot()
+
+    def __call(self, endpoint=str, body=dict, refresh=False):
+        '''Grab response from endpoint, `refresh` skips the cache lookup but still stores the response'''
+        start = perf_counter()
+        try:
+            if self.__cache is not None and not refresh:
+                hit, cached = self.__cache.get(endpoint, body, namespace=self.__namespace)
+                self.metrics.count(endpoint, 'cache_hits' if hit else 'cache_misses')
+                if hit:
+                    return cached
+            if self.__flights is None:
+                return self.__fetch(endpoint, body)
+            payload, shared = self.__flights.do(
+                ResponseCache.key(endpoint, body), lambda: self.__fetch(endpoint, body))
+            if shared:
+                self.metrics.count(endpoint, 'coalesced')
+            return payload
+        finally:
+            self.metrics.add_io(perf_counter() - start)
+
+    def __send(self, endpoint: str, body: dict) -> requests.Response:
+        '''Send a streamed request, counting it and timing it until the headers arrive'''
+        if self.__rate_limiter is not None:
+            waited = self.__rate_limiter.acquire(endpoint)
+            if waited:
+                self.metrics.observe(endpoint, 'throttle', waited)
+        for hook in self.__hooks['pre_request']:
+            hook(endpoint, body)
+        self.metrics.count(endpoint, 'requests')
+        try:
+            response = self.__request('POST', endpoint, body, stream=True)
+        except requests.RequestException:
+            # Connection errors and timeouts, after any retries
+            self.metrics.count(endpoint, 'errors')
+            self.__post_request(endpoint, body, None, {})
+            raise
+        self.metrics.observe(endpoint, 'ttfb', response.elapsed.total_seconds())
+        self.metrics.status(endpoint, response.status_code)
+        if not response.status_code == 200:
+            self.metrics.count(endpoint, 'errors')
+        return response
+
+    def __post_request(self, endpoint: str, body: dict, response: Optional[requests.Response], timings: Dict):
+        for hook in self.__hooks['post_request']:
+            hook(endpoint, body, response, timings)
+
+    def __fetch(self, endpoint: str, body: dict):
+        response = self.__send(endpoint, body)
+        timings = {'ttfb': response.elapsed.total_seconds()}
+
+        start = perf_counter()
+        content = response.content
+        timings['transfer'] = perf_counter() - start
+        self.metrics.observe(endpoint, 'transfer', timings['transfer'])
+        self.metrics.count(endpoint, 'bytes', len(content))
+
+        payload = None
+        if response.status_code == 200:
+            start = perf_counter()
+            payload = response.json()
+            timings['decode'] = perf_counter() - start
+            self.metrics.observe(endpoint, 'decode', timings['decode'])
+            if self.__cache is not None:
+                self.__cache.set(endpoint, body, payload, namespace=self.__namespace)
+
+        self.__post_request(endpoint, body, response, timings)
+        return payload
+
+    def __stream(self, endpoint: str, body: dict, prefix: str) -> Iterator:
+        '''Yield items from an endpoint's response as they are parsed'''
+        if self.__cache is not None:
+            hit, cached = self.__cache.get(endpoint, body, namespace=self.__namespace)
+            self.metrics.count(endpoint, 'cache_hits' if hit else 'cache_misses')
+            if hit:
+                yield from walk(cached, prefix)
+                return
+
+        response = self.__send(endpoint, body)
+        timings = {'ttfb': response.elapsed.total_seconds()}
+        if not response.status_code == 200:
+            response.close()
+            self.__post_request(endpoint, body, response, timings)
+            response.raise_for_status()
+        # Parsing is interleaved with reading, so transfer is only the time spent waiting on the body
+        received = {'bytes': 0, 'seconds': 0.0}
+        try:
+            yield from iter_items(response, prefix, received)
+        finally:
+            timings['transfer'] = received['seconds']
+            self.metrics.observe(endpoint, 'transfer', received['seconds'])
+            self.metrics.count(endpoint, 'bytes', received['bytes'])
+            self.__post_request(endpoint, body, response, timings)
+
+    @timed_transform('grades')
+    def grades(self, course_id=None, milestones=False, return_null=False, output='dict') -> Dict:
         """Fetches grades for a courseId.
 
         Calls the sessions endpoint to retrieve details about a session
@@ -153,15 +476,23 @@ class Bootcampspot:
             courseId (int): takes an integer corresponding to a courseId
             milestones (bool): takes a boolean determining whether milestones will be included in the output
             return_null (bool): takes boolean determining whether assignments with all None values are returned **i.e.** assignments yet to be assigned.
+            output (str): 'dict' for nested dicts, 'compact' for GradeRecord tuples, or 'records', 'columnar', 'dataframe' or 'arrow' for flat student/assignment/grade rows
 
         Returns:
             dict: The grades, by assignment, for each student
         """
+        if output not in tabular.OUTPUTS:
+            raise ValueError(f"Invalid output: {output}. Try one of these: {list(tabular.OUTPUTS)}")
 
-        course_id, enrollment_id = self.__course_check(course_id)
+        course_id, enrollment_id = self.__course_check(course_id, need_enrollment=False)
 
         body = {'courseId': course_id}
         response = self.__call('grades', body)
+
+        if not output == 'dict':
+            return tabular.convert(tabular.grade_columns(response, milestones, return_null), output,
+                                   record=GradeRecord)
+
         grades = {}
 
         def _value_check(grade):
@@ -194,7 +525,8 @@ class Bootcampspot:
 
         return grades
 
-    def sessions(self, course_id=None, enrollment_id=None, career_ok=False, orientation_ok=False) -> Dict:
+    @timed_transform('sessions')
+    def sessions(self, course_id=None, enrollment_id=None, career_ok=False, orientation_ok=False, output='dict') -> List:
         """Fetches session for course corresponding to courseId.
 
         Calls the sessions endpoint to retrieve details about a session
@@ -203,10 +535,14 @@ class Bootcampspot:
             courseId (int): takes an integer corresponding to a courseId
             enrollmentId (int): takes an integer corresponding to an enrollmentId
             career_ok (bool): takes in a boolean to limit results to academic sessions.
+            output (str): 'dict' for a list of dicts, 'compact' for a list of SessionRecord tuples
 
         Returns:
-            dict: The session details for the session matching session_id
+            list: The sessions for the course
         """
+        if output not in ('dict', 'compact'):
+            raise ValueError(f"Invalid output: {output}. Try one of these: ['dict', 'compact']")
+
         if enrollment_id == None:
             course_id, enrollment_id = self.__course_check(course_id)
         else:
@@ -217,79 +553,90 @@ class Bootcampspot:
         # Perform API call
         sessions = self.__call('sessions', body=body)
 
-        sessions_list = []
-
-        def session_append(session):
-            sessions_list.append({'id': session_info['id'],
-                                  'name': session_info['name'],
-                                  'short_description': session_info['shortDescription'],
-                                  'long_description': session_info['longDescription'],
-                                  'start_time': session_info['startTime'][:-1],
-                                  'end_time': session_info['endTime'][:-1],
-                                  'chapter': session_info['chapter'],
-                                  'context': session_type,
-                                  'classroom': session['classroom'],
-                                  'video_url_list': session['videoUrlList']
-                                  })
-
-        def mask_check(session_type):
-            if session_type == 'career':
-                if career_ok:
-                    return True
-                else:
-                    return False
-            elif session_type == 'orientation':
-                if orientation_ok:
-                    return True
-                else:
-                    return False
-            elif not course_id == None:
-                if session_info['courseId'] == course_id:
-                    return True
-                else:
-                    return False
-            else:
-                return True
-
         # Loop through current week sessions
-        for session in sessions['calendarSessions']:
+        sessions_list = [tabular.session_row(session) for session in sessions['calendarSessions']
+                         if tabular.session_mask(session, course_id, career_ok, orientation_ok)]
+        if output == 'compact':
+            return [session_record(session) for session in sessions_list]
+        return sessions_list
 
-            session_info = session['session']
-            session_type = session['context']['contextCode']
+    def iter_grades(self, course_id=None, milestones=False) -> Iterator[Dict]:
+        """Streams grades for a courseId one row at a time.
 
-            # Filter on courseId and session code (to remove career entries)
-            # Pull out session name, start time (ISO 8601 with UTC TZ removed)
-            if mask_check(session_type):
-                session_append(session)
+        Rows are yielded as the response is parsed, so an export never holds
+        the whole payload. Unlike `grades()` rows for assignments with no
+        grades yet are not dropped, that takes the whole payload to decide.
 
-        return sessions_list
+        Args:
+            course_id (int): takes an integer corresponding to a courseId
+            milestones (bool): takes a boolean determining whether milestones will be included in the output
+
+        Yields:
+            dict: ``{'student', 'assignment', 'grade'}`` for each student and assignment
+        """
+        course_id, _ = self.__course_check(course_id, need_enrollment=False)
 
-    def attendance(self, course_id=None, by='student') -> Dict:
+        for row in self.__stream('grades', {'courseId': course_id}, 'item'):
+            if not milestones and 'Milestone' in row['assignmentTitle']:
+                continue
+            yield {'student': row['studentName'], 'assignment': row['assignmentTitle'], 'grade': row['grade']}
+
+    def iter_sessions(self, course_id=None, enrollment_id=None, career_ok=False, orientation_ok=False) -> Iterator[Dict]:
+        """Streams the sessions `sessions()` would return one at a time.
+
+        Yields:
+            dict: the same session records as `sessions()`
+        """
+        if enrollment_id == None:
+            course_id, enrollment_id = self.__course_check(course_id)
+        else:
+            enrollment_id = self.__enrollment_check(enrollment_id)
+
+        for session in self.__stream('sessions', {'enrollmentId': enrollment_id}, 'calendarSessions.item'):
+            if tabular.session_mask(session, course_id, career_ok, orientation_ok):
+                yield tabular.session_row(session)
+
+    def iter_attendance(self, course_id=None) -> Iterator[Dict]:
+        """Streams attendance for a courseId one row at a time.
+
+        Students with no known status at all are not dropped, unlike `attendance()`.
+
+        Yields:
+            dict: ``{'student', 'session', 'status'}`` for each student and session
+        """
+        course_id, _ = self.__course_check(course_id, need_enrollment=False)
+
+        for row in self.__stream('attendance', {'courseId': course_id}, 'item'):
+            yield {'student': row['studentName'], 'session': row['sessionName'],
+                   'status': tabular.attendance_status(row)}
+
+    @timed_transform('attendance')
+    def attendance(self, course_id=None, by='student', output='dict') -> Dict:
         """Fetches attendance for each student/course.
 
         Calls the attendance uri and encodes the attendance value as a category.
 
         Args:
             course_id (int): takes an integer corresponding to a course_id
+            by (str): 'student' or 'session', the outer key of the dict output
+            output (str): 'dict' for nested dicts, 'compact' for AttendanceRecord tuples, or 'records', 'columnar', 'dataframe' or 'arrow' for flat student/session/status rows
 
         Returns:
             dict: The student name, session name and attendance value.
         """
-        course_id, enrollment_id = self.__course_check(course_id)
+        if output not in tabular.OUTPUTS:
+            raise ValueError(f"Invalid output: {output}. Try one of these: {list(tabular.OUTPUTS)}")
+
+        course_id, enrollment_id = self.__course_check(course_id, need_enrollment=False)
 
         body = {'courseId': course_id}
         response = self.__call(endpoint='attendance', body=body)
 
-        def switch(session):
-            if session['present'] == True and session['remote'] == False:
-                return 'present'
-            elif session['remote'] == True:
-                return 'remote'
-            elif session['excused'] == True and not session['excused'] == None:
-                return 'excused'
-            elif session['present'] == False and session['excused'] == False:
-                return 'absent'
+        if not output == 'dict':
+            return tabular.convert(tabular.attendance_columns(response, by), output,
+                                   record=AttendanceRecord)
 
+        switch = tabular.attendance_status
         attendance = {}
 
         if by == 'student':
@@ -327,21 +674,136 @@ class Bootcampspot:
             dict: The session details for the session matching session_id
         """
 
+        return self.__session_detail(session_id)['session']
+
+    def __past_detail(self, session_id: int) -> Optional[Dict]:
+        '''Stored details of a session that has ended, None if not stored'''
+        store = self.__cache if self.__cache is not None else self.__past_details
+        hit, detail = store.get('sessionDetail', {'sessionId': session_id}, namespace=self.__namespace)
+        return detail if hit else None
+
+    def __session_detail(self, session_id: int) -> Dict:
         body = {'sessionId': session_id}
-        session_detail_response = self.__call('sessionDetail', body)
+        store = self.__cache if self.__cache is not None else self.__past_details
+        hit, stored = store.get('sessionDetail', body, namespace=self.__namespace)
+        if self.__cache is not None:
+            self.metrics.count('sessionDetail', 'cache_hits' if hit else 'cache_misses')
+        if hit:
+            return stored
+
+        # Already looked up, so only a response from the API gets here and is written back
+        session_detail_response = self.__call('sessionDetail', body, refresh=True)
+
+        end_time = session_detail_response['session']['session'].get('endTime')
+        if end_time and epoch(end_time) < time.time() and not store.ttl_for('sessionDetail') == 0:
+            store.set('sessionDetail', body, session_detail_response, ttl=None, namespace=self.__namespace)
+        return session_detail_response
+
+    def session_details_many(self, session_ids: Iterable[int], max_concurrency: int = None) -> Dict[int, Dict]:
+        """Fetches session details for many sessions at once.
+
+        Duplicate ids are fetched once and the rest are fetched concurrently
+        over the shared connection pool. Details of sessions that have already
+        ended never change, so they are kept and reused without another call
+        until `invalidate()` drops them, unless the cache's ``sessionDetail``
+        time to live is 0.
+
+        Args:
+            session_ids (iterable): session ids to fetch
+            max_concurrency (int): most requests in flight at once, defaults to the connection pool size
+
+        Returns:
+            dict: ``{session_id: details}`` with the same details as `session_details()`
+        """
+        session_ids = list(dict.fromkeys(session_ids))
+        details = _fan_out(self.session_details, [(session_id,) for session_id in session_ids],
+                           max_concurrency or self.__pool_size)
+        return dict(zip(session_ids, details))
 
-        return session_detail_response['session']
+    def session_index(self, course_id=None, refresh=False) -> SessionIndex:
+        """Returns the course's sessions sorted by start time for fast lookups.
+
+        The index is built once per course and reused until `invalidate()` is
+        called or `refresh` is set. With a cache it is also rebuilt when the
+        cached sessions response is stored again or expires, without one once
+        it is older than `sessions_ttl` seconds.
+
+        Args:
+            course_id (int): takes an integer corresponding to a courseId
+            refresh (bool): refetch the sessions and rebuild the index
+
+        Returns:
+            SessionIndex: sessions sorted by start time
+        """
+        course_id, enrollment_id = self.__course_check(course_id)
+        body = {'enrollmentId': enrollment_id}
+
+        memo = self.__session_indexes.get(course_id)
+        if memo is not None and not refresh:
+            stored, index, built = memo
+            if self.__cache is None:
+                if self.__sessions_ttl is None or time.monotonic() - built < self.__sessions_ttl:
+                    return index
+            elif stored is not None and self.__cache.stored('sessions', body, namespace=self.__namespace) == stored:
+                return index
+
+        payload = self.__call('sessions', body=body, refresh=refresh)
+        index = SessionIndex([tabular.session_row(session) for session in payload['calendarSessions']
+                              if tabular.session_mask(session, course_id)])
+        stored = None if self.__cache is None else self.__cache.stored('sessions', body, namespace=self.__namespace)
+        self.__session_indexes[course_id] = (stored, index, time.monotonic())
+        return index
+
+    def session_at(self, time=None, course_id=None) -> Optional[Dict]:
+        """Returns the session in progress at a time.
+
+        Args:
+            time: a datetime (naive is UTC), ISO 8601 string or epoch seconds, defaults to now
+            course_id (int): takes an integer corresponding to a courseId
+
+        Returns:
+            dict: the session record, None if no class is running
+        """
+        return self.session_index(course_id).at(datetime.utcnow() if time is None else time)
+
+    def sessions_between(self, start, end, course_id=None) -> List[Dict]:
+        """Returns the sessions starting in [start, end).
+
+        Args:
+            start: a datetime (naive is UTC), ISO 8601 string or epoch seconds
+            end: a datetime (naive is UTC), ISO 8601 string or epoch seconds
+            course_id (int): takes an integer corresponding to a courseId
+
+        Returns:
+            list: session records sorted by start time
+        """
+        return self.session_index(course_id).between(start, end)
+
+    def next_session(self, course_id=None, time=None) -> Optional[Dict]:
+        """Returns the next session to start.
+
+        Sessions come from the course's session index, so without a cache a
+        rescheduled session shows up once the index is `sessions_ttl` old.
+
+        Args:
+            course_id (int): takes an integer corresponding to a courseId
+            time: a datetime (naive is UTC), ISO 8601 string or epoch seconds, defaults to now
+
+        Returns:
+            dict: the session record, None if there are no more sessions
+        """
+        return self.session_index(course_id).next(datetime.utcnow() if time is None else time)
 
     def session_closest(self, course_id=None) -> Dict:
         """Fetches sessions list and returns nearest class to now.
 
-        Based on the courseId and enrollmentId, it will call the sessions
-        endpoint, find the closest session['startTime'] to datetime.utcnow()
-        and call the sessionDetail endpoint using session['id'] corresponding
-        to that session['startTime']
+        Based on the courseId and enrollmentId, it will find the closest
+        session['startTime'] to datetime.utcnow() in the course's session
+        index and call the sessionDetail endpoint using session['id']
+        corresponding to that session['startTime']. Without a cache the
+        sessions list is refetched once the index is `sessions_ttl` old.
 
         Args:
-            enrollment_id (int): takes an integer for the enrollmentId to pass
             course_id (int): courseId for the session you'd like to retrieve.
 
         Returns:
@@ -349,72 +811,271 @@ class Bootcampspot:
 
         """
 
-        course_id, enrollment_id = self.__course_check(course_id)
-
-        now = datetime.utcnow()
-        session_list = self.sessions(
-            course_id=course_id)
+        closest_session_id = self.session_index(course_id).closest(datetime.utcnow())['id']
 
-        def closest_date(session_list: list, now):
-            return min(session_list, key=lambda x: abs(datetime.fromisoformat(x['start_time']) - now))
+        return self.__session_detail(closest_session_id)['session']['session']
 
-        closest_session_id = closest_date(session_list, now)['id']
+    @timed_transform('weeklyFeedback')
+    def feedback(self, course_id=None, output='dict') -> Dict:
+        """Fetches weekly feedback.
 
-        body = {'sessionId': closest_session_id}
-        session_detail_response = self.__call('sessionDetail', body)
+        The course's survey definition is compiled once and reused until it
+        changes. Answers like 'N/A', 'none' or 'no' come back as None.
 
-        return session_detail_response['session']['session']
+        Args:
+            course_id (int): takes an integer corresponding to a courseId
+            output (str): 'dict' for answers by student, or 'columnar', 'records', 'dataframe' or 'arrow' for student, date and one column per question
 
-    def feedback(self, course_id=None) -> Dict:
-        """Fetches weekly feedback."""
+        Returns:
+            dict: each student's submission timestamp and answers by question
+        """
+        if output not in FEEDBACK_OUTPUTS:
+            raise ValueError(f"Invalid output: {output}. Try one of these: {list(FEEDBACK_OUTPUTS)}")
 
-        course_id, enrollment_id = self.__course_check(course_id)
+        course_id, enrollment_id = self.__course_check(course_id, need_enrollment=False)
         body = {'courseId': course_id}
         response = self.__call(endpoint='weeklyFeedback', body=body)
 
-        q_text = response['surveyDefinition']['steps']
-        feedback_struct = {question['stepNumber']: question['text'].split(
-            '(')[0][:-1] for question in q_text}
-
-        def process(inp):
-            try:
-                ignore_list = ['n/a', 'na', 'none', 'no']
-                answer = student['answers'][inp]['answer']['value']
-                if answer.lower() == any(ignore_list):
-                    return None
-                else:
-                    return answer
-            except TypeError:
-                return None
-
-        feedback = {}
-        for student in response['submissions']:
-            feedback[student['username']] = {
-                'timestamp': datetime.fromisoformat(student['date'].split('T')[0])
-            }
-            for idx, question in enumerate(feedback_struct):
-                feedback[student['username']
-                         ][feedback_struct[str(idx+1)]] = process(idx)
-
-        return feedback
+        columns = self.__feedback.columns(course_id, response)
+        if output == 'dict':
+            return to_dict(columns)
+        return tabular.convert(columns, output)
 
     @property
     def feedback_chapter(self, course_id=None) -> str:
         """Fetches week of feedback"""
 
-        course_id, _ = self.__course_check(course_id)
+        course_id, _ = self.__course_check(course_id, need_enrollment=False)
         body = {'courseId': course_id}
         response = self.__call(endpoint='weeklyFeedback', body=body)
 
-        session_list = self.sessions(
-            course_id=course_id)
-
-        def closest_date(session_list: list, time):
-            return min(session_list, key=lambda x: abs(datetime.fromisoformat(x['start_time']) - time))
-
         feedback_date = datetime.fromisoformat(
             response['submissions'][0]['date'][:-1].split('T')[0])
-        feedback_chapter = closest_date(session_list, feedback_date)[
+        feedback_chapter = self.session_index(course_id).closest(feedback_date)[
             'chapter'].split('.')[0]
 
         return feedback_chapter
+
+    def sweep(self, endpoints: Iterable[str] = ENDPOINTS, courses: Iterable[int] = None,
+              max_workers: int = None) -> SweepResult:
+        """Calls several methods for many courses at once.
+
+        Calls run on a thread pool and share this instance's connection pool.
+        A failed call doesn't stop the sweep, its exception is collected in
+        the result's ``errors`` instead.
+
+        Args:
+            endpoints (iterable): method names to call, any of grades, attendance, sessions, feedback and session_closest
+            courses (iterable): courseIds to sweep, defaults to all of `my_courses`
+            max_workers (int): threads to run calls on, defaults to the connection pool size
+
+        Returns:
+            SweepResult: ``{courseId: {endpoint: result}}`` with failed calls collected in ``.errors``
+        """
+        endpoints = check_endpoints(endpoints)
+        courses = list(self.my_courses if courses is None else courses)
+        jobs = [(course_id, endpoint) for course_id in courses for endpoint in endpoints]
+
+        results = _fan_out(lambda course_id, endpoint: getattr(self, endpoint)(course_id=course_id),
+                           jobs, max_workers or self.__pool_size, return_exceptions=True)
+        sweep = SweepResult()
+        for (course_id, endpoint), result in zip(jobs, results):
+            sweep.add(course_id, endpoint, result)
+        return sweep
+
+    def snapshot(self, endpoint: str, course_id=None) -> Snapshot:
+        """Fetches the current cells of grades or attendance for change detection.
+
+        The response always comes from the API so the snapshot is fresh, and
+        it replaces any cached one. Grades include milestones and not yet
+        graded assignments.
+
+        Args:
+            endpoint (str): 'grades' or 'attendance'
+            course_id (int): takes an integer corresponding to a courseId
+
+        Returns:
+            Snapshot: ``{(student, assignment or session): value}`` cells
+
+        Raises:
+            BCSError: the API didn't answer with a 200
+        """
+        if endpoint not in CELL_COLUMNS:
+            raise ValueError(f"Invalid endpoint: {endpoint}. Try one of these: {list(CELL_COLUMNS)}")
+        course_id, _ = self.__course_check(course_id, need_enrollment=False)
+        payload = self.__call(endpoint, {'courseId': course_id}, refresh=True)
+        if payload is None:
+            raise BCSError(f"Couldn't snapshot {endpoint} for course {course_id}")
+
+        if endpoint == 'grades':
+            columns = tabular.grade_columns(payload, milestones=True, return_null=True)
+        else:
+            columns = tabular.attendance_columns(payload)
+        return Snapshot.from_columns(endpoint, course_id, columns)
+
+    def changes_since(self, snapshot: Snapshot) -> Changes:
+        """Fetches a fresh snapshot and diffs it against an older one.
+
+        Args:
+            snapshot (Snapshot): an earlier snapshot from `snapshot()`
+
+        Returns:
+            Changes: added, changed and removed cells, the new snapshot is on ``.snapshot``
+        """
+        return diff(snapshot, self.snapshot(snapshot.endpoint, snapshot.course_id))
+
+    def cohort_metrics(self, courses: Iterable[int] = None, max_workers: int = None, **kwargs):
+        """Computes per-student grade and attendance metrics for many courses in one pass.
+
+        Raw grades and attendance are fetched concurrently and handed to
+        :func:`bcs.analytics.student_metrics`, which needs numpy.
+
+        Args:
+            courses (iterable): courseIds to include, defaults to all of `my_courses`
+            max_workers (int): threads to fetch on, defaults to the connection pool size
+
+        Keyword arguments are passed through to `student_metrics`, e.g. `min_average` or `output`.
+
+        Returns:
+            dict: one entry per student keyed by ``analytics.METRICS``
+
+        Raises:
+            CourseError: a courseId isn't in your enrollments
+            BCSError: the API didn't answer with a 200 for some course
+        """
+        courses = list(self.my_courses if courses is None else courses)
+        for course_id in courses:
+            self.index.course(course_id)
+        jobs = [(endpoint, course_id) for endpoint in ('grades', 'attendance') for course_id in courses]
+
+        payloads = dict(zip(jobs, _fan_out(lambda endpoint, course_id: self.__call(endpoint, {'courseId': course_id}),
+                                           jobs, max_workers or self.__pool_size)))
+
+        missing = [job for job, payload in payloads.items() if payload is None]
+        if missing:
+            missing = ', '.join(f"{endpoint} of course {course_id}" for endpoint, course_id in missing)
+            raise BCSError(f"No response for {missing}")
+        return analytics.student_metrics({course_id: payloads['grades', course_id] for course_id in courses},
+                                         {course_id: payloads['attendance', course_id] for course_id in courses},
+                                         **kwargs)
+
+    def refresh(self, endpoint: str, course_id=None):
+        """Fetches an endpoint for a course from the API and stores it in the cache.
+
+        Unlike invalidating and calling again, the cached response keeps
+        answering other calls until the fresh one replaces it. For
+        session_closest the sessions are refreshed first, then the details
+        of the closest session.
+
+        Args:
+            endpoint (str): one of grades, attendance, sessions, feedback or session_closest
+            course_id (int): takes an integer corresponding to a courseId
+
+        Raises:
+            BCSError: the API didn't answer with a 200, the cached response is left as is
+        """
+        if endpoint not in SWEEPABLE:
+            raise ValueError(f"Invalid endpoint: {endpoint}. Try one of these: {list(SWEEPABLE)}")
+        course_id, _ = self.__course_check(course_id, need_enrollment=endpoint in ('sessions', 'session_closest'))
+
+        if endpoint == 'session_closest':
+            closest = self.session_index(course_id, refresh=True).closest(datetime.utcnow())
+            if epoch(closest['end_time']) < time.time() and self.__past_detail(closest['id']) is not None:
+                return
+            endpoint, body = 'sessionDetail', {'sessionId': closest['id']}
+        else:
+            endpoint, body = self.__endpoint_request(endpoint, course_id)
+        if self.__call(endpoint, body, refresh=True) is None:
+            raise BCSError(f"Couldn't refresh {endpoint} for course {course_id}")
+
+    def prefetch(self, endpoints: Iterable[str] = PREFETCH, courses: Iterable[int] = None,
+                 interval: float = None, jitter: float = 0.1, max_workers: int = None,
+                 on_error=None) -> Prefetcher:
+        """Starts refreshing endpoints into the cache in the background.
+
+        Needs a response cache. By default today's `session_closest()`,
+        `grades()` and `attendance()` are kept warm for every course, so the
+        first call of the day is served from the cache. Rounds run at half
+        the cache's time to live unless `interval` says otherwise. The
+        scheduler is stopped by `close()`, or call its `stop()`.
+
+        See :class:`bcs.prefetch.Prefetcher` for the arguments.
+
+        Returns:
+            Prefetcher: the running scheduler
+        """
+        prefetcher = Prefetcher(self, endpoints=endpoints, courses=courses, interval=interval, jitter=jitter,
+                                max_workers=max_workers or self.__pool_size, on_error=on_error)
+        self.__prefetchers.append(prefetcher)
+        return prefetcher.start()
+
+    def __endpoint_request(self, method: str, course_id: int):
+        '''The (endpoint, body) a per-course method sends'''
+        if method == 'sessions':
+            return 'sessions', {'enrollmentId': self.index.course(course_id)['enrollmentId']}
+        endpoint = 'weeklyFeedback' if method == 'feedback' else method
+        return endpoint, {'courseId': course_id}
+
+    def export_snapshot(self, path: str, courses: Iterable[int] = None, endpoints: Iterable[str] = ENDPOINTS,
+                        session_details: bool = False, max_workers: int = None):
+        """Writes every endpoint for every course to a snapshot file for offline use.
+
+        The file stores the raw responses in a compact columnar layout, see
+        :mod:`bcs.archive`. Open it with :meth:`Bootcampspot.load_snapshot`.
+
+        Args:
+            path (str): file to write
+            courses (iterable): courseIds to export, defaults to all of `my_courses`
+            endpoints (iterable): any of grades, attendance, sessions and feedback
+            session_details (bool): also export the sessions and the details of every session, needed for `session_details()` and `session_closest()` offline
+            max_workers (int): threads to fetch on, defaults to the connection pool size
+        """
+        endpoints = check_endpoints(endpoints)
+        if 'session_closest' in endpoints:
+            raise ValueError("Invalid endpoints: ['session_closest']. Use session_details=True instead")
+        courses = list(self.my_courses if courses is None else courses)
+        if session_details and 'sessions' not in endpoints:
+            # session_closest() offline looks the closest session up in the sessions response
+            endpoints.append('sessions')
+        calls = {}
+        for course_id in courses:
+            for method in endpoints:
+                endpoint, body = self.__endpoint_request(method, course_id)
+                calls[ResponseCache.key(endpoint, body)] = (endpoint, body)
+        calls = list(calls.values())
+
+        max_workers = max_workers or self.__pool_size
+        payloads = _fan_out(self.__call, calls, max_workers)
+        responses = [(endpoint, body, payload) for (endpoint, body), payload in zip(calls, payloads)]
+
+        if session_details:
+            session_ids = list(dict.fromkeys(session['id'] for course_id in courses
+                                             for session in self.session_index(course_id)))
+            details = _fan_out(self.__session_detail, [(session_id,) for session_id in session_ids], max_workers)
+            responses += [('sessionDetail', {'sessionId': session_id}, detail)
+                          for session_id, detail in zip(session_ids, details)]
+
+        missing = [(endpoint, body) for endpoint, body, payload in responses if payload is None]
+        if missing:
+            raise SnapshotError(f"Couldn't fetch {missing}")
+        write_snapshot(path, self.__fetch_me(), responses)
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> 'Bootcampspot':
+        """Opens a snapshot file as an offline client.
+
+        The file is memory-mapped and responses are decoded on first use, so
+        loading is near-instant. The client has the same query methods, and a
+        call that needs a response the snapshot doesn't hold raises
+        SnapshotError instead of going to the network.
+
+        Args:
+            path (str): a file written by `export_snapshot()`
+
+        Returns:
+            Bootcampspot: a client answering from the snapshot
+        """
+        snapshot = SnapshotCache(path)
+        store = MemoryTokenStore(max_age=None)
+        store.save('snapshot', '', 'offline', snapshot.me)
+        return cls('snapshot', '', session=offline_session(), cache=snapshot, token_store=store, coalesce=False)
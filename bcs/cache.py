@@ -0,0 +1,248 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+MISS = object()
+
+
+class ResponseCache:
+    """Base class for response caches.
+
+    Responses are keyed by endpoint and request body, and by an optional
+    namespace so clients for different accounts or API roots can share one
+    cache without reading each other's responses. Each endpoint can have
+    its own time to live, and the least recently used entries are evicted
+    once the cache holds ``maxsize`` responses, whatever their namespace.
+    Subclasses only provide the storage: ``_get``, ``_stored``, ``_set``,
+    ``_delete``, ``_entries`` and ``clear``.
+
+    Args:
+        ttl (float): default seconds a response stays fresh, ``None`` never expires
+        ttls (dict): per-endpoint overrides of ``ttl``, a value of 0 disables caching for that endpoint
+        maxsize (int): most responses held before the least recently used are evicted
+    """
+
+    def __init__(self, ttl: float = 300, ttls: Dict[str, float] = None, maxsize: int = 1024):
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(endpoint: str, body: dict, namespace: str = None) -> str:
+        if namespace is None:
+            return json.dumps([endpoint, body], sort_keys=True, separators=(',', ':'))
+        return json.dumps([namespace, endpoint, body], sort_keys=True, separators=(',', ':'))
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.ttl)
+
+    def get(self, endpoint: str, body: dict, namespace: str = None) -> Tuple[bool, object]:
+        """Returns ``(hit, value)`` for a cached response."""
+        with self._lock:
+            value = self._get(self.key(endpoint, body, namespace), time.time())
+        if value is MISS:
+            return False, None
+        return True, value
+
+    def stored(self, endpoint: str, body: dict, namespace: str = None) -> Optional[float]:
+        """Returns when a fresh cached response was stored, None if there isn't one.
+
+        The response itself isn't read, so this is a cheap way to tell whether it changed.
+        """
+        with self._lock:
+            stored = self._stored(self.key(endpoint, body, namespace), time.time())
+        return None if stored is MISS else stored
+
+    def set(self, endpoint: str, body: dict, value, ttl: float = MISS, namespace: str = None):
+        """Stores a response, ``ttl`` overrides the endpoint's time to live."""
+        ttl = self.ttl_for(endpoint) if ttl is MISS else ttl
+        if ttl == 0:
+            return
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._set(self.key(endpoint, body, namespace), endpoint, body, value, expires)
+
+    def invalidate(self, endpoint: str = None, body: dict = None,
+                   where: Callable[[str, dict], bool] = None, namespace: str = None) -> int:
+        """Drops cached responses matching every condition given.
+
+        With no arguments the whole cache is cleared.
+
+        Args:
+            endpoint (str): only drop responses from this endpoint
+            body (dict): only drop responses whose request body contains these items
+            where (callable): only drop responses for which ``where(endpoint, body)`` is true
+            namespace (str): only drop responses stored under this namespace
+
+        Returns:
+            int: the number of responses dropped
+        """
+        def match(entry_endpoint, entry_body):
+            if endpoint is not None and entry_endpoint != endpoint:
+                return False
+            if body is not None and any(entry_body.get(k) != v for k, v in body.items()):
+                return False
+            return where is None or where(entry_endpoint, entry_body)
+
+        with self._lock:
+            stale = [key for key, entry_endpoint, entry_body in self._entries()
+                     if self.__within(key, entry_endpoint, entry_body, namespace)
+                     and match(entry_endpoint, entry_body)]
+            for key in stale:
+                self._delete(key)
+        return len(stale)
+
+    def items(self, namespace: str = None):
+        """Yields ``(endpoint, body, value)`` for every fresh cached response, or every one in a namespace."""
+        with self._lock:
+            entries = self._entries()
+        for key, endpoint, body in entries:
+            if not self.__within(key, endpoint, body, namespace):
+                continue
+            with self._lock:
+                value = self._get(key, time.time())
+            if value is not MISS:
+                yield endpoint, body, value
+
+    def __within(self, key: str, endpoint: str, body: dict, namespace: str) -> bool:
+        return namespace is None or key == self.key(endpoint, body, namespace)
+
+    def clear(self):
+        raise NotImplementedError
+
+    def _get(self, key: str, now: float):
+        raise NotImplementedError
+
+    def _stored(self, key: str, now: float):
+        raise NotImplementedError
+
+    def _set(self, key: str, endpoint: str, body: dict, value, expires: float):
+        raise NotImplementedError
+
+    def _delete(self, key: str):
+        raise NotImplementedError
+
+    def _entries(self):
+        raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU response cache.
+
+    Cached responses are returned as-is, not copied, so treat them as read only.
+    """
+
+    def __init__(self, ttl: float = 300, ttls: Dict[str, float] = None, maxsize: int = 1024):
+        super().__init__(ttl=ttl, ttls=ttls, maxsize=maxsize)
+        self.__data = OrderedDict()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def clear(self):
+        with self._lock:
+            self.__data.clear()
+
+    def _get(self, key, now):
+        entry = self.__data.get(key)
+        if entry is None:
+            return MISS
+        endpoint, body, value, expires, stored = entry
+        if expires is not None and expires <= now:
+            del self.__data[key]
+            return MISS
+        self.__data.move_to_end(key)
+        return value
+
+    def _stored(self, key, now):
+        entry = self.__data.get(key)
+        if entry is None or entry[3] is not None and entry[3] <= now:
+            return MISS
+        return entry[4]
+
+    def _set(self, key, endpoint, body, value, expires):
+        self.__data[key] = (endpoint, body, value, expires, time.time())
+        self.__data.move_to_end(key)
+        while len(self.__data) > self.maxsize:
+            self.__data.popitem(last=False)
+
+    def _delete(self, key):
+        self.__data.pop(key, None)
+
+    def _entries(self):
+        return [(key, entry[0], entry[1]) for key, entry in self.__data.items()]
+
+
+class SqliteCache(ResponseCache):
+    """On-disk LRU response cache backed by sqlite.
+
+    Survives restarts and can be shared by several processes pointed at the
+    same file. Clients namespace their entries by account and API root, so
+    one file can also serve several accounts.
+
+    Args:
+        path (str): sqlite database file, created if missing
+    """
+
+    def __init__(self, path: str, ttl: float = 300, ttls: Dict[str, float] = None, maxsize: int = 1024):
+        super().__init__(ttl=ttl, ttls=ttls, maxsize=maxsize)
+        self.path = path
+        self.__db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY, endpoint TEXT, body TEXT,
+                                value TEXT, expires REAL, used REAL, stored REAL)''')
+        self.__db.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+        # Files written before responses recorded when they were stored
+        columns = [row[1] for row in self.__db.execute('PRAGMA table_info(responses)')]
+        if 'stored' not in columns:
+            self.__db.execute('ALTER TABLE responses ADD COLUMN stored REAL')
+            self.__db.execute('UPDATE responses SET stored = used')
+
+    def __len__(self):
+        with self._lock:
+            return self.__db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        self.__db.close()
+
+    def clear(self):
+        with self._lock:
+            self.__db.execute('DELETE FROM responses')
+
+    def _get(self, key, now):
+        row = self.__db.execute(
+            'SELECT value, expires FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return MISS
+        value, expires = row
+        if expires is not None and expires <= now:
+            self._delete(key)
+            return MISS
+        self.__db.execute('UPDATE responses SET used = ? WHERE key = ?', (now, key))
+        return json.loads(value)
+
+    def _stored(self, key, now):
+        row = self.__db.execute(
+            'SELECT stored FROM responses WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, now)).fetchone()
+        return MISS if row is None else row[0]
+
+    def _set(self, key, endpoint, body, value, expires):
+        now = time.time()
+        self.__db.execute('''INSERT OR REPLACE INTO responses (key, endpoint, body, value, expires, used, stored)
+                             VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                          (key, endpoint, json.dumps(body), json.dumps(value), expires, now, now))
+        self.__db.execute('''DELETE FROM responses WHERE key IN (
+                                SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)''',
+                          (self.maxsize,))
+
+    def _delete(self, key):
+        self.__db.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def _entries(self):
+        return [(key, endpoint, json.loads(body)) for key, endpoint, body in
+                self.__db.execute('SELECT key, endpoint, body FROM responses')]
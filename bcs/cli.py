@@ -0,0 +1,256 @@
+"""The ``bcs`` console command.
+
+Credentials come from ``--email`` or the ``BCS_EMAIL`` environment variable,
+and from ``BCS_PASSWORD`` or a prompt.
+
+Example:
+    $ export BCS_EMAIL=me@example.com BCS_PASSWORD=...
+    $ bcs export --courses all --endpoints grades,attendance --format csv --workers 8 --out exports
+"""
+import argparse
+import csv
+import getpass
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List
+
+from .bootcampspot import Bootcampspot
+from .sweep import ENDPOINTS
+from .transport import BCS_ROOT
+
+FORMATS = ('csv', 'parquet')
+CHECKPOINT = '.bcs-export.json'
+BATCH = 10000
+
+
+def _cell(value):
+    # Nested values (session classrooms, video urls) are written as JSON text
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return json.dumps(value)
+
+
+def rows(client: Bootcampspot, endpoint: str, course_id: int) -> Iterator[Dict]:
+    '''Streams the flat rows of one endpoint for one course'''
+    if endpoint == 'grades':
+        return client.iter_grades(course_id)
+    elif endpoint == 'attendance':
+        return client.iter_attendance(course_id)
+    elif endpoint == 'sessions':
+        return client.iter_sessions(course_id)
+    elif endpoint == 'feedback':
+        return iter(client.feedback(course_id, output='records'))
+    raise ValueError(f"Invalid endpoint: {endpoint}. Try one of these: {list(ENDPOINTS)}")
+
+
+def write_csv(path: str, stream: Iterable[Dict]) -> int:
+    n = 0
+    with open(path, 'w', newline='') as f:
+        writer = None
+        for row in stream:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow({name: _cell(value) for name, value in row.items()})
+            n += 1
+    return n
+
+
+def write_parquet(path: str, stream: Iterable[Dict]) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("--format parquet requires pyarrow: pip install pyarrow")
+
+    def infer(values: List):
+        present = [value for value in values if value is not None]
+        if present and all(isinstance(value, bool) for value in present):
+            return pa.bool_()
+        if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+            return pa.int64()
+        if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            return pa.float64()
+        return pa.string()
+
+    n = 0
+    writer = None
+    schema = None
+    batch = []
+
+    def flush():
+        nonlocal writer, schema
+        columns = {name: [_cell(row.get(name)) for row in batch] for name in batch[0]}
+        if schema is None:
+            schema = pa.schema([(name, infer(values)) for name, values in columns.items()])
+            writer = pq.ParquetWriter(path, schema)
+        writer.write_table(pa.table({name: columns.get(name, [None] * len(batch)) for name in schema.names},
+                                    schema=schema))
+        batch.clear()
+
+    try:
+        for row in stream:
+            batch.append(row)
+            n += 1
+            if len(batch) >= BATCH:
+                flush()
+        if batch:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return n
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet}
+
+
+class Checkpoint:
+    """Finished export jobs, saved after each one so a rerun can skip them.
+
+    Args:
+        path (str): JSON file to keep progress in
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.done = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = json.load(f)['done']
+
+    def finished(self, name: str, out: str) -> bool:
+        return name in self.done and os.path.exists(os.path.join(out, name))
+
+    def mark(self, name: str, stats: Dict):
+        with self.__lock:
+            self.done[name] = stats
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump({'done': self.done}, f)
+            os.replace(tmp, self.path)
+
+
+def export(client: Bootcampspot, out: str, courses: Iterable[int] = None, endpoints: Iterable[str] = ENDPOINTS,
+           format: str = 'csv', workers: int = 8, restart: bool = False, log=sys.stderr) -> Dict:
+    """Exports endpoints for many courses to one file each, in parallel and resumably.
+
+    Files are written to ``out/<endpoint>/<courseId>.<format>``. Rows are
+    streamed to a temporary file that is renamed into place once complete.
+    Finished jobs are recorded in a checkpoint in `out`, and a rerun skips
+    them unless `restart` is set.
+
+    Returns:
+        dict: ``rows``, ``bytes``, ``seconds``, ``jobs``, ``skipped`` and ``failed`` (``{file: error}``)
+    """
+    if format not in WRITERS:
+        raise ValueError(f"Invalid format: {format}. Try one of these: {list(FORMATS)}")
+    courses = list(client.my_courses if courses is None else courses)
+    os.makedirs(out, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out, CHECKPOINT))
+    if restart:
+        checkpoint.done.clear()
+
+    jobs = [(endpoint, course_id, f"{endpoint}/{course_id}.{format}") for endpoint in endpoints for course_id in courses]
+    pending = [job for job in jobs if not checkpoint.finished(job[2], out)]
+    for endpoint in endpoints:
+        os.makedirs(os.path.join(out, endpoint), exist_ok=True)
+
+    def run(endpoint: str, course_id: int, name: str) -> Dict:
+        path = os.path.join(out, name)
+        tmp = f"{path}.part"
+        start = time.perf_counter()
+        try:
+            n = WRITERS[format](tmp, rows(client, endpoint, course_id))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+        stats = {'rows': n, 'bytes': os.path.getsize(path), 'seconds': time.perf_counter() - start}
+        checkpoint.mark(name, stats)
+        return stats
+
+    summary = {'rows': 0, 'bytes': 0, 'jobs': len(pending), 'skipped': len(jobs) - len(pending), 'failed': {}}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, *job): job[2] for job in pending}
+        for future in as_completed(futures):
+            name = futures[future]
+            error = future.exception()
+            if error is not None:
+                summary['failed'][name] = error
+                print(f"failed  {name}: {error!r}", file=log)
+                continue
+            stats = future.result()
+            summary['rows'] += stats['rows']
+            summary['bytes'] += stats['bytes']
+            print(f"done    {name}: {stats['rows']} rows in {stats['seconds']:.2f}s", file=log)
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def report(summary: Dict) -> str:
+    seconds = max(summary['seconds'], 1e-9)
+    return (f"Exported {summary['rows']} rows ({summary['bytes'] / 1e6:.1f} MB) from "
+            f"{summary['jobs'] - len(summary['failed'])} jobs in {summary['seconds']:.2f}s: "
+            f"{summary['rows'] / seconds:.0f} rows/s, {summary['bytes'] / 1e6 / seconds:.1f} MB/s. "
+            f"Skipped {summary['skipped']} finished, {len(summary['failed'])} failed.")
+
+
+def parse_courses(value: str):
+    if value == 'all':
+        return None
+    try:
+        return [int(course_id) for course_id in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid courses: {value}. Use 'all' or comma-separated courseIds")
+
+
+def parse_endpoints(value: str) -> List[str]:
+    endpoints = value.split(',')
+    invalid = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"Invalid endpoints: {invalid}. Try some of these: {list(ENDPOINTS)}")
+    return endpoints
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='bcs', description='Bootcampspot API tools')
+    parser.add_argument('--email', default=os.environ.get('BCS_EMAIL'),
+                        help='login email, defaults to $BCS_EMAIL')
+    parser.add_argument('--bcs-root', default=BCS_ROOT, help='API root url')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    exporter = commands.add_parser('export', help='export endpoints for many courses to files')
+    exporter.add_argument('--courses', type=parse_courses, default=None,
+                        help="'all' or comma-separated courseIds (default: all)")
+    exporter.add_argument('--endpoints', type=parse_endpoints, default=list(ENDPOINTS),
+                        help=f"comma-separated, any of {','.join(ENDPOINTS)} (default: all)")
+    exporter.add_argument('--format', choices=FORMATS, default='csv')
+    exporter.add_argument('--workers', type=int, default=8, help='parallel downloads (default: 8)')
+    exporter.add_argument('--out', default='bcs-export', help='output directory (default: bcs-export)')
+    exporter.add_argument('--restart', action='store_true', help='ignore the checkpoint and export everything again')
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = parser().parse_args(argv)
+    if not args.email:
+        print('bcs: set BCS_EMAIL or pass --email', file=sys.stderr)
+        return 2
+    password = os.environ.get('BCS_PASSWORD') or getpass.getpass(f"Password for {args.email}: ")
+
+    with Bootcampspot(args.email, password, bcs_root=args.bcs_root, pool_size=max(args.workers, 1)) as client:
+        summary = export(client, args.out, courses=args.courses, endpoints=args.endpoints,
+                         format=args.format, workers=args.workers, restart=args.restart)
+    print(report(summary))
+    return 1 if summary['failed'] else 0
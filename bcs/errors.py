@@ -53,3 +53,21 @@ class EnrollmentError(BCSError):
 
     def __init__(self, msg):
         super().__init__(msg)
+
+
+class SnapshotError(BCSError):
+    """Snapshot missing data or unreadable.
+
+    Extension of the BCSError base class, raised by clients loaded from a
+    snapshot file when a call needs a response the snapshot doesn't hold, or
+    when the file isn't a valid snapshot.
+
+    Args:
+        msg (str): A string representing the body of the error message.
+
+    Raises:
+        SnapshotError: msg
+    """
+
+    def __init__(self, msg):
+        super().__init__(msg)
@@ -0,0 +1,224 @@
+"""Weekly feedback processing.
+
+`FeedbackEngine` compiles each course's survey definition once into an
+ordered tuple of questions. It reuses the compiled survey until the
+definition changes. Submissions are flattened into columns, one per
+question, aligned with a student column. `FeedbackHistory` keeps every week
+pulled for every course, optionally on disk, so a semester of feedback
+across cohorts can be queried at once.
+"""
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import tabular
+from .sweep import _fan_out
+
+IGNORED = frozenset({'', 'n/a', 'na', 'none', 'no'})
+
+OUTPUTS = ('dict', 'records', 'columnar', 'dataframe', 'arrow')
+
+
+def question_text(text: str) -> str:
+    '''The question without its trailing parenthetical, e.g. the "(1-10)" of a rating'''
+    return text.split('(')[0][:-1]
+
+
+def normalize(answer: Dict, ignored: frozenset = IGNORED) -> Optional[str]:
+    '''The value of a submission answer, None if it's empty or a non-answer like "N/A"'''
+    try:
+        value = answer['answer']['value']
+    except (KeyError, TypeError):
+        return None
+    if not isinstance(value, str) or value.strip().lower() in ignored:
+        return None
+    return value
+
+
+class Survey:
+    """A compiled survey definition.
+
+    Args:
+        steps (list): ``surveyDefinition.steps`` from the weeklyFeedback endpoint
+
+    Attributes:
+        key (tuple): ``(stepNumber, text)`` of every step, all the compiled survey depends on
+        questions (tuple): question texts in step order, answers line up with them by position
+    """
+    __slots__ = ('steps', 'key', 'questions')
+
+    def __init__(self, steps: List[Dict]):
+        self.steps = steps
+        self.key = self.key_of(steps)
+        ordered = sorted(steps, key=lambda step: int(step['stepNumber']))
+        self.questions = tuple(question_text(step['text']) for step in ordered)
+
+    @staticmethod
+    def key_of(steps: List[Dict]) -> Tuple:
+        return tuple((step['stepNumber'], step['text']) for step in steps)
+
+    def __repr__(self):
+        return f"Survey(questions={len(self.questions)})"
+
+
+class FeedbackEngine:
+    """Turns weeklyFeedback responses into columns, one compiled survey per course.
+
+    Args:
+        ignored (iterable): lowercase answers treated as no answer
+    """
+
+    def __init__(self, ignored: Iterable[str] = IGNORED):
+        self.ignored = frozenset(ignored)
+        self.__lock = threading.Lock()
+        self.__surveys = {}
+
+    def survey(self, course_id: int, response: Dict) -> Survey:
+        '''The compiled survey for a response, recompiled only when the definition changes'''
+        steps = response['surveyDefinition']['steps']
+        with self.__lock:
+            survey = self.__surveys.get(course_id)
+            # A cached response hands back the same steps, otherwise compare step numbers and texts only
+            if survey is None or not (survey.steps is steps or survey.key == Survey.key_of(steps)):
+                survey = self.__surveys[course_id] = Survey(steps)
+        return survey
+
+    def columns(self, course_id: int, response: Dict) -> Dict[str, List]:
+        """Flattens a weeklyFeedback response into question × student columns.
+
+        Returns:
+            dict: equal length lists keyed by 'student', 'date' (ISO 8601) and each question
+        """
+        questions = self.survey(course_id, response).questions
+        submissions = response['submissions']
+        ignored = self.ignored
+        columns = {'student': [submission['username'] for submission in submissions],
+                   'date': [submission['date'].split('T')[0] for submission in submissions]}
+        answers = [submission['answers'] or () for submission in submissions]
+        for position, question in enumerate(questions):
+            columns[question] = [normalize(row[position], ignored) if position < len(row) else None
+                                 for row in answers]
+        return columns
+
+
+def to_dict(columns: Dict[str, List]) -> Dict[str, Dict]:
+    '''``{student: {'timestamp': datetime, question: answer}}`` from feedback columns'''
+    questions = [name for name in columns if name not in ('student', 'date')]
+    timestamps = {value: datetime.fromisoformat(value) for value in set(columns['date'])}
+    feedback = {}
+    for i, student in enumerate(columns['student']):
+        entry = feedback[student] = {'timestamp': timestamps[columns['date'][i]]}
+        for question in questions:
+            entry[question] = columns[question][i]
+    return feedback
+
+
+def week_of(day: str) -> str:
+    '''ISO week of an ISO 8601 date, e.g. ``'2020-W04'``'''
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class FeedbackHistory:
+    """Keeps weekly feedback for many courses and queries across weeks.
+
+    Each pull stores the course's current survey results under the ISO week
+    they were submitted in, replacing an earlier pull of the same week.
+
+    Args:
+        client (Bootcampspot): the client to fetch with
+        path (str): JSON file to persist weeks in between runs, memory only if None
+
+    Example:
+        >>> history = FeedbackHistory(bcs, path='feedback.json')
+        >>> history.pull_all()
+        >>> history.query(since='2020-W10', questions=['How well are you keeping up with the pace?'])
+    """
+
+    def __init__(self, client, path: str = None):
+        self.client = client
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__weeks = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self.__weeks = {self.__parse(key): columns for key, columns in json.load(f).items()}
+
+    @staticmethod
+    def __parse(key: str) -> Tuple[int, str]:
+        course_id, week = key.split(':')
+        return int(course_id), week
+
+    def weeks(self, course_id: int = None) -> List[Tuple[int, str]]:
+        '''Stored ``(courseId, week)`` pairs, oldest first'''
+        return sorted(key for key in self.__weeks if course_id is None or key[0] == course_id)
+
+    def pull(self, course_id: int = None) -> Tuple[int, str]:
+        """Fetches a course's current feedback and stores it under its week.
+
+        Returns:
+            tuple: the ``(courseId, week)`` stored, None if nobody has submitted yet
+        """
+        course_id = self.client.course if course_id is None else course_id
+        columns = self.client.feedback(course_id, output='columnar')
+        if not columns['date']:
+            return None
+        key = (course_id, week_of(max(columns['date'])))
+        with self.__lock:
+            self.__weeks[key] = columns
+            self.__save()
+        return key
+
+    def pull_all(self, courses: Iterable[int] = None, max_workers: int = None) -> List[Tuple[int, str]]:
+        '''Pulls every course concurrently, defaults to all of `my_courses`'''
+        courses = list(self.client.my_courses if courses is None else courses)
+        keys = _fan_out(self.pull, [(course_id,) for course_id in courses], max_workers)
+        return [key for key in keys if key is not None]
+
+    def query(self, courses: Iterable[int] = None, since: str = None, until: str = None,
+              questions: Iterable[str] = None, output: str = 'columnar'):
+        """Stacks stored weeks into one table.
+
+        Questions a week's survey didn't ask are None for that week.
+
+        Args:
+            courses (iterable): courseIds to include, defaults to all stored
+            since (str): first ISO week to include, e.g. '2020-W04'
+            until (str): last ISO week to include
+            questions (iterable): question columns to include, defaults to every question asked
+            output (str): 'columnar', 'records', 'dataframe' or 'arrow'
+
+        Returns:
+            dict: equal length lists keyed by 'course', 'week', 'student', 'date' and each question
+        """
+        if output not in OUTPUTS or output == 'dict':
+            raise ValueError(f"Invalid output: {output}. Try one of these: {list(OUTPUTS[1:])}")
+        courses = None if courses is None else set(courses)
+        with self.__lock:
+            weeks = [(key, self.__weeks[key]) for key in sorted(self.__weeks)
+                     if (courses is None or key[0] in courses)
+                     and (since is None or key[1] >= since) and (until is None or key[1] <= until)]
+
+        if questions is None:
+            questions = list(dict.fromkeys(name for _, columns in weeks for name in columns
+                                           if name not in ('student', 'date')))
+        table = {name: [] for name in ['course', 'week', 'student', 'date'] + list(questions)}
+        for (course_id, week), columns in weeks:
+            n = len(columns['student'])
+            table['course'] += [course_id] * n
+            table['week'] += [week] * n
+            table['student'] += columns['student']
+            table['date'] += columns['date']
+            for question in questions:
+                table[question] += columns.get(question) or [None] * n
+        return tabular.convert(table, output)
+
+    def __save(self):
+        if self.path is None:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({f"{course_id}:{week}": columns for (course_id, week), columns in self.__weeks.items()}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,86 @@
+from typing import Dict, List
+
+from .errors import CourseError, EnrollmentError
+
+
+class CourseIndex:
+    """Constant-time lookups between courseIds, enrollmentIds and cohort names.
+
+    Built once from `class_details`, it replaces the list scans used to check
+    ids and to map a course to its enrollment.
+
+    Args:
+        class_details (list): records with `courseName`, `courseId` and `enrollmentId` keys
+
+    Attributes:
+        by_course (dict): courseId -> record
+        by_enrollment (dict): enrollmentId -> [records], one per course in the enrollment
+        by_cohort (dict): courseName -> record
+    """
+
+    def __init__(self, class_details: List[Dict]):
+        self.by_course = {}
+        self.by_enrollment = {}
+        self.by_cohort = {}
+        for record in class_details:
+            self.by_course[record['courseId']] = record
+            self.by_enrollment.setdefault(record['enrollmentId'], []).append(record)
+            self.by_cohort[record['courseName']] = record
+
+    def __len__(self):
+        return len(self.by_course)
+
+    def course(self, course_id: int) -> Dict:
+        try:
+            return self.by_course[course_id]
+        except (KeyError, TypeError):
+            msg = f'Invalid courseId: {course_id} not in your courses. Try one of these: {list(self.by_course)}'
+            raise CourseError(msg)
+
+    def enrollment(self, enrollment_id: int) -> List[Dict]:
+        try:
+            return self.by_enrollment[enrollment_id]
+        except (KeyError, TypeError):
+            msg = f'Invalid enrollmentId: {enrollment_id} not in your enrollments. Try one of these: {list(self.by_enrollment)}'
+            raise EnrollmentError(msg)
+
+    def cohort(self, name: str) -> Dict:
+        try:
+            return self.by_cohort[name]
+        except (KeyError, TypeError):
+            msg = f'Invalid cohort: {name} not in your cohorts. Try one of these: {list(self.by_cohort)}'
+            raise CourseError(msg)
+
+    def lookup(self, course: int = None, enrollment: int = None, cohort: str = None) -> List[Dict]:
+        """Finds the records matching every id given.
+
+        Args:
+            course (int): a courseId
+            enrollment (int): an enrollmentId
+            cohort (str): a cohort/course name
+
+        Returns:
+            list: matching `class_details` records, all of them if no id is given
+
+        Raises:
+            CourseError: the courseId or cohort is unknown, or doesn't match the other ids
+            EnrollmentError: the enrollmentId is unknown
+        """
+        if course is None and enrollment is None and cohort is None:
+            return list(self.by_course.values())
+
+        matches = None
+        if course is not None:
+            matches = [self.course(course)]
+        if cohort is not None:
+            record = self.cohort(cohort)
+            matches = [record] if matches is None or record in matches else []
+        if enrollment is not None:
+            records = self.enrollment(enrollment)
+            matches = list(records) if matches is None else [
+                record for record in matches if record['enrollmentId'] == enrollment]
+
+        if not matches:
+            msg = f'No course matches courseId {course}, enrollmentId {enrollment} and cohort {cohort}'
+            raise CourseError(msg)
+        return matches
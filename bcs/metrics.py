@@ -0,0 +1,138 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Dict
+
+PHASES = ('throttle', 'ttfb', 'transfer', 'decode', 'transform')
+
+COUNTERS = {'requests': 'Requests sent to the API',
+            'errors': 'Requests that failed or did not return a 200',
+            'bytes': 'Response body bytes received',
+            'cache_hits': 'Calls answered from the response cache',
+            'cache_misses': 'Calls the response cache could not answer',
+            'coalesced': 'Calls that shared an identical in-flight request'}
+
+
+class Metrics:
+    """Thread-safe per-endpoint counters and phase timers.
+
+    Phases are ``throttle`` (waiting on the rate limiter), ``ttfb`` (time to
+    first byte, from sending the request until the response headers arrive),
+    ``transfer`` (reading the body), ``decode`` (parsing the JSON) and
+    ``transform`` (the wrapper's own post-processing).
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__endpoints = {}
+
+    def __entry(self, endpoint: str) -> Dict:
+        entry = self.__endpoints.get(endpoint)
+        if entry is None:
+            entry = {name: 0 for name in COUNTERS}
+            entry['status'] = {}
+            entry['timers'] = {}
+            self.__endpoints[endpoint] = entry
+        return entry
+
+    def count(self, endpoint: str, name: str, n: int = 1):
+        with self.__lock:
+            entry = self.__entry(endpoint)
+            entry[name] += n
+
+    def status(self, endpoint: str, code: int):
+        with self.__lock:
+            codes = self.__entry(endpoint)['status']
+            codes[code] = codes.get(code, 0) + 1
+
+    def observe(self, endpoint: str, phase: str, seconds: float):
+        with self.__lock:
+            timer = self.__entry(endpoint)['timers'].setdefault(
+                phase, {'count': 0, 'total': 0.0, 'max': 0.0})
+            timer['count'] += 1
+            timer['total'] += seconds
+            timer['max'] = max(timer['max'], seconds)
+
+    @contextmanager
+    def timer(self, endpoint: str, phase: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(endpoint, phase, perf_counter() - start)
+
+    def add_io(self, seconds: float):
+        '''Time this thread spent waiting on the API or cache, excluded from `transform`'''
+        self.__local.io = self.io() + seconds
+
+    def io(self) -> float:
+        return getattr(self.__local, 'io', 0.0)
+
+    def reset(self):
+        with self.__lock:
+            self.__endpoints.clear()
+
+    def snapshot(self) -> Dict:
+        """Returns a copy of every counter and timer, keyed by endpoint.
+
+        Timers report ``count``, ``total`` and ``max`` seconds plus the ``mean``.
+        """
+        with self.__lock:
+            stats = {}
+            for endpoint, entry in self.__endpoints.items():
+                stats[endpoint] = {name: entry[name] for name in COUNTERS}
+                stats[endpoint]['status'] = dict(entry['status'])
+                stats[endpoint]['timers'] = {
+                    phase: dict(timer, mean=timer['total'] / timer['count'])
+                    for phase, timer in entry['timers'].items()}
+        return stats
+
+    def to_prometheus(self, prefix: str = 'bcs') -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        stats = self.snapshot()
+        lines = []
+        for name, help_text in COUNTERS.items():
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}.")
+            lines.append(f"# TYPE {metric} counter")
+            for endpoint, entry in stats.items():
+                lines.append(f'{metric}{{endpoint="{endpoint}"}} {entry[name]}')
+
+        metric = f"{prefix}_responses_total"
+        lines.append(f"# HELP {metric} Responses received by status code.")
+        lines.append(f"# TYPE {metric} counter")
+        for endpoint, entry in stats.items():
+            for code, n in sorted(entry['status'].items()):
+                lines.append(f'{metric}{{endpoint="{endpoint}",status="{code}"}} {n}')
+
+        metric = f"{prefix}_phase_seconds"
+        lines.append(f"# HELP {metric} Time spent per call phase.")
+        lines.append(f"# TYPE {metric} summary")
+        for endpoint, entry in stats.items():
+            for phase, timer in entry['timers'].items():
+                labels = f'endpoint="{endpoint}",phase="{phase}"'
+                lines.append(f"{metric}_sum{{{labels}}} {timer['total']:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {timer['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+def timed_transform(endpoint: str):
+    """Times a Bootcampspot method as the ``transform`` phase of an endpoint.
+
+    Time the method spends waiting on the API or cache is subtracted, so only
+    the wrapper's own processing is counted.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            io_before = metrics.io()
+            start = perf_counter()
+            result = method(self, *args, **kwargs)
+            elapsed = perf_counter() - start - (metrics.io() - io_before)
+            metrics.observe(endpoint, 'transform', max(elapsed, 0.0))
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,126 @@
+import random
+import threading
+from typing import Callable, Iterable
+
+from .sweep import SweepResult, _fan_out, check_endpoints
+
+PREFETCH = ('session_closest', 'grades', 'attendance')
+
+# The cached endpoints each method's refresh writes
+CACHED = {'grades': ('grades',), 'attendance': ('attendance',), 'sessions': ('sessions',),
+          'feedback': ('weeklyFeedback',), 'session_closest': ('sessions', 'sessionDetail')}
+
+
+class Prefetcher:
+    """Keeps a client's response cache warm from a background thread.
+
+    Every `interval` seconds, give or take `jitter`, each endpoint is
+    refreshed for each course with :meth:`Bootcampspot.refresh`. A refresh
+    skips the cache on the way in and writes the fresh response back, so
+    user-facing calls keep hitting the cache and never wait on a cold fetch.
+    The first round runs as soon as the scheduler starts. A failed refresh
+    leaves the previous response in place and is retried next round.
+
+    Args:
+        client (Bootcampspot): a client with a response cache
+        endpoints (iterable): any of grades, attendance, sessions, feedback and session_closest
+        courses (iterable): courseIds to refresh, defaults to all of `my_courses` at each round
+        interval (float): seconds between rounds. The longest wait, ``interval * (1 + jitter)``, must be
+            shorter than the endpoints' cache time to live or entries would expire before they're
+            refreshed. Defaults to half the shortest time to live, or 300 if none expire
+        jitter (float): fraction of `interval` each wait is randomly stretched or shrunk by, so many
+            clients don't all refresh at the same moment
+        max_workers (int): threads to refresh on
+        on_error (callable): called as ``on_error(course_id, endpoint, error)`` for each failed refresh
+
+    Attributes:
+        last (SweepResult): the latest round, failed refreshes are in ``last.errors``
+        rounds (int): rounds completed
+    """
+
+    def __init__(self, client, endpoints: Iterable[str] = PREFETCH, courses: Iterable[int] = None,
+                 interval: float = None, jitter: float = 0.1, max_workers: int = None,
+                 on_error: Callable = None):
+        if client.cache is None:
+            raise ValueError("Prefetching needs a client with a response cache, pass cache= to Bootcampspot")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"Invalid jitter: {jitter}. Must be at least 0 and less than 1")
+        endpoints = check_endpoints(endpoints)
+        ttls = {cached: client.cache.ttl_for(cached) for endpoint in endpoints for cached in CACHED[endpoint]}
+        uncached = [cached for cached, ttl in ttls.items() if ttl == 0]
+        if uncached:
+            raise ValueError(f"Invalid endpoints: the cache doesn't keep {uncached}, their time to live is 0")
+        shortest = min((ttl for ttl in ttls.values() if ttl is not None), default=None)
+        if interval is None:
+            # Leaves half the time to live for the round itself to run
+            interval = shortest / 2 if shortest is not None else 300
+        if interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}. Must be greater than 0")
+        if shortest is not None and interval * (1 + jitter) >= shortest:
+            raise ValueError(f"Invalid interval: {interval}. Waits of up to {interval * (1 + jitter):g}s "
+                             f"outlast the cache's {shortest:g}s time to live, so entries would expire first")
+        self.client = client
+        self.endpoints = endpoints
+        self.courses = None if courses is None else list(courses)
+        self.interval = interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.on_error = on_error
+        self.last = None
+        self.rounds = 0
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def run_once(self) -> SweepResult:
+        '''Refreshes every endpoint for every course now, in the calling thread'''
+        courses = self.client.my_courses if self.courses is None else self.courses
+        jobs = [(course_id, endpoint) for course_id in courses for endpoint in self.endpoints]
+        refreshed = _fan_out(lambda course_id, endpoint: self.client.refresh(endpoint, course_id),
+                             jobs, self.max_workers, return_exceptions=True)
+        result = SweepResult()
+        for (course_id, endpoint), outcome in zip(jobs, refreshed):
+            error = outcome if isinstance(outcome, Exception) else None
+            result.add(course_id, endpoint, error)
+            if error is not None and self.on_error is not None:
+                self.on_error(course_id, endpoint, error)
+        self.last = result
+        self.rounds += 1
+        return result
+
+    def wait_time(self) -> float:
+        '''The next wait, `interval` stretched or shrunk by up to `jitter`'''
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def __run(self):
+        while not self.__stop.is_set():
+            try:
+                self.run_once()
+            except Exception as error:
+                # e.g. /me failing while listing courses, try again next round
+                if self.on_error is not None:
+                    self.on_error(None, None, error)
+            self.__stop.wait(self.wait_time())
+
+    def start(self) -> 'Prefetcher':
+        if self.running:
+            return self
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name='bcs-prefetch', daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        '''Stops after the round in progress, if any, waiting up to timeout seconds for it'''
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,52 @@
+"""Compact record types for long-lived results.
+
+Each record is a NamedTuple, so it carries no per-instance ``__dict__``.
+Student, assignment and session names, along with grades and statuses, are
+interned, so every record that repeats a name shares one string.
+"""
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class GradeRecord(NamedTuple):
+    student: str
+    assignment: str
+    grade: Optional[str]
+
+
+class AttendanceRecord(NamedTuple):
+    student: str
+    session: str
+    status: Optional[str]
+
+
+class SessionRecord(NamedTuple):
+    id: int
+    name: str
+    short_description: str
+    long_description: str
+    start_time: str
+    end_time: str
+    chapter: str
+    context: str
+    classroom: object
+    video_url_list: Tuple[str, ...]
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def from_columns(columns: Dict[str, List], record) -> List[NamedTuple]:
+    '''Builds records from equal length columns named like the record's fields'''
+    interned = [[_intern(value) for value in columns[field]] for field in record._fields]
+    return [record._make(row) for row in zip(*interned)]
+
+
+def session_record(session: Dict) -> SessionRecord:
+    '''Builds a SessionRecord from a session dict as returned by `sessions()`'''
+    return SessionRecord(session['id'], _intern(session['name']), session['short_description'],
+                         session['long_description'], _intern(session['start_time']),
+                         _intern(session['end_time']), _intern(session['chapter']),
+                         _intern(session['context']), session['classroom'],
+                         tuple(session['video_url_list'] or ()))
@@ -0,0 +1,185 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from typing import Callable, Dict, List, Tuple
+
+from .bootcampspot import Bootcampspot
+from .cache import MemoryCache, ResponseCache
+from .transport import build_session
+
+
+class ClientRegistry:
+    """Thread-safe, process-wide pool of logged in clients keyed by credentials.
+
+    Every client shares one connection pool, so the service holds at most
+    `pool_size` connections to the API however many instructors it serves.
+    Each client keeps its own response cache, so one instructor's data is
+    never served to another. Clients idle for longer than `ttl` are dropped,
+    and the least recently used are dropped once more than `maxsize` are held.
+    Concurrent first requests for the same credentials wait on one login.
+
+    Passwords are never kept in the registry's keys, only a keyed hash of them.
+
+    Args:
+        maxsize (int): most clients held
+        ttl (float): seconds a client may sit unused before it's dropped, never if None
+        pool_size (int): connections shared by all clients
+        pool_block (bool): wait for a free connection rather than open one past `pool_size`
+        cache (callable): builds each client's response cache, None for no cache
+        retries (int): retries on connection errors, 429 and 5xx responses
+        backoff_factor (float): base of the exponential sleep between retries
+
+    Other keyword arguments are passed to every Bootcampspot client, e.g. `bcs_root` or `rate_limiter`.
+    A shared `token_store` only hands a stored token to the password it was saved with, so a
+    caller who knows just an email still has to log in.
+
+    Example:
+        >>> registry = ClientRegistry(maxsize=500, ttl=1800, pool_size=32)
+        >>> def handler(request):
+        ...     bcs = registry.get(request.email, request.password)
+        ...     return bcs.grades(request.course_id)
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 1800, pool_size: int = 32, pool_block: bool = True,
+                 cache: Callable[[], ResponseCache] = MemoryCache, retries: int = 3,
+                 backoff_factor: float = 0.5, **client_kwargs):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.__cache = cache
+        self.__client_kwargs = client_kwargs
+        self.__session = build_session(pool_size=pool_size, retries=retries,
+                                       backoff_factor=backoff_factor, pool_block=pool_block)
+        # Auth travels in a per-request header, cookies would be shared between tenants
+        self.__session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.__salt = os.urandom(16)
+        self.__lock = threading.Lock()
+        self.__clients = OrderedDict()
+        self.__logins = {}
+        self.__counts = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __key(self, email: str, password: str) -> Tuple[str, str]:
+        return email, hmac.new(self.__salt, password.encode(), hashlib.sha256).hexdigest()
+
+    def __len__(self):
+        return len(self.__clients)
+
+    def get(self, email: str, password: str) -> Bootcampspot:
+        """Returns the client for these credentials, logging in only if none is held.
+
+        Raises whatever the login raises, and nothing is kept on failure.
+        """
+        key = self.__key(email, password)
+        with self.__lock:
+            expired = self.__expire(time.monotonic())
+            client = self.__touch(key)
+            if client is None:
+                login = self.__logins.setdefault(key, threading.Lock())
+        self.__close(expired)
+        if client is not None:
+            return client
+
+        with login:
+            with self.__lock:
+                client = self.__touch(key)
+                if client is not None:
+                    return client
+            evicted = []
+            try:
+                client = Bootcampspot(email, password, session=self.__session, pool_size=self.pool_size,
+                                      cache=self.__cache() if self.__cache is not None else None,
+                                      **self.__client_kwargs)
+            except BaseException:
+                with self.__lock:
+                    self.__logins.pop(key, None)
+                raise
+            # Stored in the same step the login lock is dropped, so no caller can find neither
+            with self.__lock:
+                self.__logins.pop(key, None)
+                self.__counts['misses'] += 1
+                self.__clients[key] = [client, time.monotonic()]
+                while len(self.__clients) > self.maxsize:
+                    evicted.append(self.__drop(next(iter(self.__clients))))
+        self.__close(evicted)
+        return client
+
+    def __touch(self, key) -> Bootcampspot:
+        # Caller holds the lock
+        entry = self.__clients.get(key)
+        if entry is None:
+            return None
+        entry[1] = time.monotonic()
+        self.__clients.move_to_end(key)
+        self.__counts['hits'] += 1
+        return entry[0]
+
+    def __expire(self, now: float) -> List[Bootcampspot]:
+        # Caller holds the lock. Least recently used first, so expired clients are all at the front
+        expired = []
+        if self.ttl is None:
+            return expired
+        while self.__clients:
+            key, (_, used) = next(iter(self.__clients.items()))
+            if now - used < self.ttl:
+                break
+            expired.append(self.__drop(key))
+        return expired
+
+    def __drop(self, key) -> Bootcampspot:
+        # Caller holds the lock and closes the client once it's released
+        client, _ = self.__clients.pop(key)
+        self.__counts['evictions'] += 1
+        return client
+
+    @staticmethod
+    def __close(clients: List[Bootcampspot]):
+        # Closing stops prefetching, which can wait on a round in progress, so never under the lock
+        for client in clients:
+            client.close()
+
+    def evict(self, email: str, password: str = None) -> int:
+        """Drops the clients for an email, or for one email and password.
+
+        Returns:
+            int: the number of clients dropped
+        """
+        with self.__lock:
+            if password is not None:
+                stale = [self.__key(email, password)]
+            else:
+                stale = [key for key in self.__clients if key[0] == email]
+            dropped = [self.__drop(key) for key in stale if key in self.__clients]
+        self.__close(dropped)
+        return len(dropped)
+
+    def expire(self) -> int:
+        '''Drops every client idle for longer than `ttl`, returns how many'''
+        with self.__lock:
+            expired = self.__expire(time.monotonic())
+        self.__close(expired)
+        return len(expired)
+
+    def stats(self) -> Dict:
+        '''Clients held plus hits, misses (logins) and evictions so far'''
+        with self.__lock:
+            return dict(self.__counts, clients=len(self.__clients))
+
+    def clear(self):
+        with self.__lock:
+            dropped = [self.__drop(key) for key in list(self.__clients)]
+        self.__close(dropped)
+
+    def close(self):
+        '''Drops every client and closes the shared connection pool'''
+        self.clear()
+        self.__session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,66 @@
+import json
+from time import perf_counter
+from typing import Dict, Iterator
+
+import requests
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def walk(payload, prefix: str) -> Iterator:
+    '''Yield the items of an already decoded payload at an ijson-style prefix, e.g. `calendarSessions.item`'''
+    parts = prefix.split('.') if prefix else []
+    if not parts:
+        yield payload
+        return
+    head, rest = parts[0], '.'.join(parts[1:])
+    if head == 'item':
+        for item in payload:
+            yield from walk(item, rest)
+    else:
+        yield from walk(payload[head], rest)
+
+
+class _Received:
+    # Wraps a raw response body, counting the bytes read and the seconds spent waiting on them
+
+    def __init__(self, raw, received: Dict):
+        self.raw = raw
+        self.received = received
+
+    def read(self, size: int = -1) -> bytes:
+        start = perf_counter()
+        chunk = self.raw.read(size)
+        self.received['seconds'] += perf_counter() - start
+        self.received['bytes'] += len(chunk)
+        return chunk
+
+
+def iter_items(response: requests.Response, prefix: str, received: Dict = None) -> Iterator:
+    """Yields the items at `prefix` of a streamed JSON response.
+
+    With the optional `ijson` package installed the body is parsed
+    incrementally as it arrives, so only one item is held in memory at a
+    time. Without it the body is decoded in one go and walked.
+
+    Args:
+        response (requests.Response): a response opened with ``stream=True``
+        prefix (str): ijson-style path to the items, ``item`` for a top-level array
+        received (dict): ``bytes`` and ``seconds`` counters to add the body's size and read time to
+    """
+    received = {'bytes': 0, 'seconds': 0.0} if received is None else received
+    try:
+        if ijson is not None:
+            response.raw.decode_content = True
+            yield from ijson.items(_Received(response.raw, received), prefix, use_float=True)
+        else:
+            start = perf_counter()
+            content = response.content
+            received['seconds'] += perf_counter() - start
+            received['bytes'] += len(content)
+            yield from walk(json.loads(content), prefix)
+    finally:
+        response.close()
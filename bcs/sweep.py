@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+
+ENDPOINTS = ('grades', 'attendance', 'sessions', 'feedback')
+
+# Methods taking a course_id that a sweep can call
+SWEEPABLE = ENDPOINTS + ('session_closest',)
+
+
+def check_endpoints(endpoints: Iterable[str]) -> List[str]:
+    if isinstance(endpoints, str):
+        endpoints = endpoints.split(',')
+    endpoints = list(endpoints)
+    invalid = [endpoint for endpoint in endpoints if endpoint not in SWEEPABLE]
+    if invalid:
+        raise ValueError(f"Invalid endpoints: {invalid}. Try some of these: {list(SWEEPABLE)}")
+    return endpoints
+
+
+def _fan_out(fn: Callable, jobs: Iterable[Tuple], max_workers: int, return_exceptions: bool = False) -> List:
+    '''Calls ``fn(*job)`` for every job on a thread pool and returns the results in job order.
+
+    With ``return_exceptions`` a failed call's exception takes the place of its
+    result, otherwise the first one in job order is raised once every call is done.
+    '''
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(fn, *job) for job in jobs]
+    if return_exceptions:
+        return [future.exception() or future.result() for future in futures]
+    return [future.result() for future in futures]
+
+
+class SweepResult(dict):
+    """Merged results of a multi-course fetch, keyed by courseId.
+
+    Each value is a dict of ``{endpoint: result}`` for that course. Calls that
+    failed are left out of the results and collected in ``errors`` instead, so
+    one bad course doesn't sink the whole sweep.
+
+    Attributes:
+        errors (dict): ``{courseId: {endpoint: exception}}`` for every failed call
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.errors: Dict[int, Dict[str, Exception]] = {}
+
+    def add(self, course_id: int, endpoint: str, result):
+        if isinstance(result, Exception):
+            self.errors.setdefault(course_id, {})[endpoint] = result
+        else:
+            self.setdefault(course_id, {})[endpoint] = result
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+CELL_COLUMNS = {'grades': ('student', 'assignment', 'grade'),
+                'attendance': ('student', 'session', 'status')}
+
+
+class Snapshot:
+    """The cells of one endpoint for one course at a point in time.
+
+    Args:
+        endpoint (str): 'grades' or 'attendance'
+        course_id (int): the course the cells belong to
+        cells (dict): ``{(student, assignment or session): value}``
+        taken (float): epoch seconds the data was fetched
+    """
+
+    def __init__(self, endpoint: str, course_id: int, cells: Dict[Tuple[str, str], object], taken: float = None):
+        self.endpoint = endpoint
+        self.course_id = course_id
+        self.cells = cells
+        self.taken = time.time() if taken is None else taken
+
+    def __repr__(self):
+        return f"Snapshot(endpoint={self.endpoint!r}, course_id={self.course_id}, cells={len(self.cells)}, taken={self.taken})"
+
+    @classmethod
+    def from_columns(cls, endpoint: str, course_id: int, columns: Dict, taken: float = None) -> 'Snapshot':
+        row, col, value = (columns[name] for name in CELL_COLUMNS[endpoint])
+        return cls(endpoint, course_id, dict(zip(zip(row, col), value)), taken)
+
+    def to_dict(self) -> Dict:
+        return {'endpoint': self.endpoint, 'course_id': self.course_id, 'taken': self.taken,
+                'cells': [[row, col, value] for (row, col), value in self.cells.items()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Snapshot':
+        cells = {(row, col): value for row, col, value in data['cells']}
+        return cls(data['endpoint'], data['course_id'], cells, data['taken'])
+
+
+class Changes:
+    """Cell-level differences between two snapshots.
+
+    Attributes:
+        added (dict): ``{cell: value}`` for cells only in the newer snapshot
+        changed (dict): ``{cell: (old, new)}`` for cells whose value changed
+        removed (dict): ``{cell: old}`` for cells only in the older snapshot
+        since (Snapshot): the older snapshot
+        snapshot (Snapshot): the newer snapshot
+    """
+
+    def __init__(self, since: Snapshot, snapshot: Snapshot):
+        self.since = since
+        self.snapshot = snapshot
+        old, new = since.cells, snapshot.cells
+        self.added = {cell: new[cell] for cell in new.keys() - old.keys()}
+        self.removed = {cell: old[cell] for cell in old.keys() - new.keys()}
+        self.changed = {cell: (old[cell], new[cell]) for cell in new.keys() & old.keys()
+                        if not old[cell] == new[cell]}
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        return f"Changes(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})"
+
+    def rows(self):
+        """Yields ``(kind, row, col, old, new)`` for every changed cell."""
+        for (row, col), value in self.added.items():
+            yield 'added', row, col, None, value
+        for (row, col), (old, new) in self.changed.items():
+            yield 'changed', row, col, old, new
+        for (row, col), value in self.removed.items():
+            yield 'removed', row, col, value, None
+
+
+def diff(since: Snapshot, snapshot: Snapshot) -> Changes:
+    if not (since.endpoint, since.course_id) == (snapshot.endpoint, snapshot.course_id):
+        raise ValueError(f"Can't diff {since} against {snapshot}, endpoint and course must match")
+    return Changes(since, snapshot)
+
+
+class IncrementalSync:
+    """Tracks the last snapshot of each course and reports only what changed.
+
+    Args:
+        client (Bootcampspot): the client to fetch with
+        path (str): JSON file to persist snapshots in between runs, memory only if None
+
+    Example:
+        >>> sync = IncrementalSync(bcs, path='snapshots.json')
+        >>> for kind, student, assignment, old, new in sync.pull('grades', 1234).rows():
+        ...     print(kind, student, assignment, old, new)
+    """
+
+    def __init__(self, client, path: str = None):
+        self.client = client
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__snapshots = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self.__snapshots = {key: Snapshot.from_dict(data) for key, data in json.load(f).items()}
+
+    def last(self, endpoint: str, course_id: int) -> Snapshot:
+        '''The stored snapshot for a course, or None before its first pull'''
+        return self.__snapshots.get(f"{endpoint}:{course_id}")
+
+    def pull(self, endpoint: str, course_id: int = None) -> Changes:
+        """Fetches a fresh snapshot, diffs it against the stored one and stores it.
+
+        The first pull of a course reports every cell as added.
+
+        Returns:
+            Changes: what changed since the last pull
+        """
+        snapshot = self.client.snapshot(endpoint, course_id)
+        with self.__lock:
+            key = f"{endpoint}:{snapshot.course_id}"
+            since = self.__snapshots.get(key) or Snapshot(endpoint, snapshot.course_id, {}, taken=0)
+            self.__snapshots[key] = snapshot
+            self.__save()
+        return diff(since, snapshot)
+
+    def __save(self):
+        if self.path is None:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({key: snapshot.to_dict() for key, snapshot in self.__snapshots.items()}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,148 @@
+from typing import Dict, List
+
+from . import records
+
+OUTPUTS = ('dict', 'records', 'compact', 'columnar', 'dataframe', 'arrow')
+
+GRADE_COLUMNS = ('student', 'assignment', 'grade')
+ATTENDANCE_COLUMNS = ('student', 'session', 'status')
+
+
+def attendance_status(row: Dict) -> str:
+    '''Collapse the present/remote/excused flags of an attendance row into one category'''
+    if row['present'] == True and row['remote'] == False:
+        return 'present'
+    elif row['remote'] == True:
+        return 'remote'
+    elif row['excused'] == True and not row['excused'] == None:
+        return 'excused'
+    elif row['present'] == False and row['excused'] == False:
+        return 'absent'
+
+
+def session_row(session: Dict) -> Dict:
+    '''Flatten a calendarSessions entry, start and end times are ISO 8601 with the UTC `Z` removed'''
+    session_info = session['session']
+    return {'id': session_info['id'],
+            'name': session_info['name'],
+            'short_description': session_info['shortDescription'],
+            'long_description': session_info['longDescription'],
+            'start_time': session_info['startTime'][:-1],
+            'end_time': session_info['endTime'][:-1],
+            'chapter': session_info['chapter'],
+            'context': session['context']['contextCode'],
+            'classroom': session['classroom'],
+            'video_url_list': session['videoUrlList']
+            }
+
+
+def session_mask(session: Dict, course_id: int = None, career_ok: bool = False, orientation_ok: bool = False) -> bool:
+    '''Filter a calendarSessions entry on courseId and session code (to remove career entries)'''
+    session_type = session['context']['contextCode']
+    if session_type == 'career':
+        return career_ok
+    elif session_type == 'orientation':
+        return orientation_ok
+    elif not course_id == None:
+        return session['session']['courseId'] == course_id
+    else:
+        return True
+
+
+def _keep(key: List, value: List) -> List[int]:
+    # Row numbers whose group in `key` has at least one non-null `value`
+    live = {k for k, v in zip(key, value) if v is not None}
+    return [i for i, k in enumerate(key) if k in live]
+
+
+def grade_columns(response: List[Dict], milestones: bool = False, return_null: bool = False) -> Dict[str, List]:
+    """Builds student, assignment and grade columns from a raw grades payload.
+
+    Args:
+        response (list): rows from the grades endpoint
+        milestones (bool): keep assignments with 'Milestone' in the title
+        return_null (bool): keep assignments where every grade is None
+
+    Returns:
+        dict: equal length lists keyed by ``GRADE_COLUMNS``
+    """
+    student, assignment, grade = [], [], []
+    for row in response:
+        if not milestones and 'Milestone' in row['assignmentTitle']:
+            continue
+        student.append(row['studentName'])
+        assignment.append(row['assignmentTitle'])
+        grade.append(row['grade'])
+
+    if not return_null:
+        keep = _keep(assignment, grade)
+        if len(keep) < len(grade):
+            student = [student[i] for i in keep]
+            assignment = [assignment[i] for i in keep]
+            grade = [grade[i] for i in keep]
+
+    return {'student': student, 'assignment': assignment, 'grade': grade}
+
+
+def attendance_columns(response: List[Dict], by: str = 'student') -> Dict[str, List]:
+    """Builds student, session and status columns from a raw attendance payload.
+
+    Students (or sessions, with ``by='session'``) without a single known
+    status are dropped, matching the dict output of `attendance()`.
+
+    Returns:
+        dict: equal length lists keyed by ``ATTENDANCE_COLUMNS``
+    """
+    student = [row['studentName'] for row in response]
+    session = [row['sessionName'] for row in response]
+    status = [attendance_status(row) for row in response]
+
+    keep = _keep(student if by == 'student' else session, status)
+    if len(keep) < len(status):
+        student = [student[i] for i in keep]
+        session = [session[i] for i in keep]
+        status = [status[i] for i in keep]
+
+    return {'student': student, 'session': session, 'status': status}
+
+
+def to_records(columns: Dict[str, List]) -> List[Dict]:
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def to_dataframe(columns: Dict[str, List]):
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("output='dataframe' requires pandas: pip install pandas")
+    return pd.DataFrame(columns)
+
+
+def to_arrow(columns: Dict[str, List]):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("output='arrow' requires pyarrow: pip install pyarrow")
+    return pa.table(columns)
+
+
+def convert(columns: Dict[str, List], output: str, record=None):
+    """Returns columns in the requested output format.
+
+    Args:
+        columns (dict): equal length lists keyed by column name
+        output (str): one of 'records', 'compact', 'columnar', 'dataframe' or 'arrow'
+        record (NamedTuple): the record type built for 'compact'
+    """
+    if output == 'compact':
+        return records.from_columns(columns, record)
+    elif output == 'columnar':
+        return columns
+    elif output == 'records':
+        return to_records(columns)
+    elif output == 'dataframe':
+        return to_dataframe(columns)
+    elif output == 'arrow':
+        return to_arrow(columns)
+    raise ValueError(f"Invalid output: {output}. Try one of these: {list(OUTPUTS)}")
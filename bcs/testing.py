@@ -0,0 +1,297 @@
+"""Local stand-in for the Bootcampspot API.
+
+`StubServer` answers `/login`, `/me`, `grades`, `attendance`, `sessions`,
+`sessionDetail` and `weeklyFeedback` on localhost with either synthetic
+payloads sized by the constructor or payloads recorded from the live API with
+:func:`record`. Point a client at it with ``bcs_root=server.url``.
+
+Example:
+    >>> with StubServer(students=300, latency=0.05) as server:
+    ...     bcs = Bootcampspot('any@email.com', 'any', bcs_root=server.url)
+    ...     bcs.grades(server.courses[0])
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List
+
+from .cache import MemoryCache
+
+LETTERS = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F', 'Incomplete', 'Unsubmitted']
+
+
+def _key(endpoint: str, body: dict) -> str:
+    return MemoryCache.key(endpoint, body)
+
+
+class StubServer:
+    """Serves synthetic or recorded Bootcampspot payloads on localhost.
+
+    Synthetic payloads are deterministic for a given `seed` and built once per
+    request body, so the server adds as little as possible to measurements.
+
+    Args:
+        courses (int): synthetic courses, two per enrollment like MW/TTH cohorts
+        students (int): students per course
+        assignments (int): graded assignments per course, the last one ungraded
+        sessions (int): class sessions per course, one every other day
+        description_size (int): characters in each session's long description
+        latency (float): seconds to sleep before answering each request
+        recorded (dict): ``{'me': payload, 'responses': [[endpoint, body, payload], ...]}`` to replay instead
+        seed (int): seed for the synthetic data
+        password (str): the only password that logs in, any does if None
+        host (str): interface to bind
+        port (int): port to bind, 0 picks a free one
+
+    Attributes:
+        url (str): the API root to pass as `bcs_root`
+        courses (list): courseIds the server knows about
+        counts (dict): requests served per endpoint
+    """
+
+    def __init__(self, courses: int = 2, students: int = 30, assignments: int = 20, sessions: int = 40,
+                 description_size: int = 200, latency: float = 0.0, recorded: Dict = None,
+                 seed: int = 0, password: str = None, host: str = '127.0.0.1', port: int = 0):
+        self.students = students
+        self.assignments = assignments
+        self.sessions = sessions
+        self.description_size = description_size
+        self.latency = latency
+        self.seed = seed
+        self.password = password
+        self.counts = {}
+        self.token = 'stub-token-0'
+        self.__lock = threading.Lock()
+        self.__failures = {}
+        self.__bodies = {}
+        self.__recorded = {}
+
+        if recorded is not None:
+            self.__me = recorded['me']
+            for endpoint, body, payload in recorded['responses']:
+                self.__recorded[_key(endpoint, body)] = payload
+        else:
+            self.__me = self.__synthetic_me(courses)
+        self.courses = [enrollment['courseId'] for enrollment in self.__me['Enrollments']]
+
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+        self.url = f"http://{host}:{self.__server.server_port}"
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'StubServer':
+        '''Replay payloads written by :func:`record`'''
+        with open(path) as f:
+            return cls(recorded=json.load(f), **kwargs)
+
+    def start(self) -> 'StubServer':
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail(self, endpoint: str, *statuses: int):
+        '''Answer the next requests to endpoint with these statuses, e.g. ``fail('grades', 503, 429)``'''
+        with self.__lock:
+            self.__failures.setdefault(endpoint, []).extend(statuses)
+
+    def expire_token(self):
+        '''Reject the current auth token, forcing clients to log in again'''
+        with self.__lock:
+            self.token = f"stub-token-{int(self.token.rsplit('-', 1)[1]) + 1}"
+
+    def __synthetic_me(self, courses: int) -> Dict:
+        enrollments = [{'id': 5000 + i // 2, 'courseId': 1000 + i,
+                        'course': {'name': f"STUB-COHORT-{i // 2:02d}-{'MW' if i % 2 == 0 else 'TTH'}"}}
+                       for i in range(courses)]
+        return {'userInfo': {'id': 1, 'userName': 'stub@bootcampspot.local', 'firstName': 'Stub',
+                             'lastName': 'Instructor', 'email': 'stub@bootcampspot.local'},
+                'Enrollments': enrollments}
+
+    def __names(self, course_id: int) -> List[str]:
+        return [f"Student {course_id}-{i:04d}" for i in range(self.students)]
+
+    def __rng(self, *parts) -> random.Random:
+        return random.Random('-'.join(str(part) for part in (self.seed,) + parts))
+
+    def __start(self, i: int) -> datetime:
+        return datetime(2020, 1, 6, 23) + timedelta(days=2 * i)
+
+    def synthetic(self, endpoint: str, body: Dict):
+        """Builds the synthetic payload for a request, None for unknown endpoints."""
+        if endpoint == 'grades':
+            course_id = body['courseId']
+            rng = self.__rng(endpoint, course_id)
+            rows = []
+            for a in range(self.assignments):
+                title = f"{a}: Homework {a}" if a % 5 else f"Milestone {a // 5}"
+                for student in self.__names(course_id):
+                    grade = None if a == self.assignments - 1 else rng.choice(LETTERS)
+                    rows.append({'assignmentTitle': title, 'studentName': student, 'grade': grade})
+            return rows
+        elif endpoint == 'attendance':
+            course_id = body['courseId']
+            rng = self.__rng(endpoint, course_id)
+            rows = []
+            for s in range(self.sessions):
+                for student in self.__names(course_id):
+                    roll = rng.random()
+                    rows.append({'sessionName': f"{s + 1}.1: Session {s}", 'studentName': student,
+                                 'present': roll < 0.85, 'remote': 0.75 < roll < 0.85,
+                                 'excused': True if roll > 0.95 else (None if roll < 0.85 else False)})
+            return rows
+        elif endpoint == 'sessions':
+            enrollment_id = body['enrollmentId']
+            calendar = []
+            for enrollment in self.__me['Enrollments']:
+                if not enrollment['id'] == enrollment_id:
+                    continue
+                for s in range(self.sessions):
+                    calendar.append(self.__session(enrollment['courseId'], s))
+            return {'calendarSessions': calendar}
+        elif endpoint == 'sessionDetail':
+            session_id = body['sessionId']
+            course_id, s = divmod(session_id, 10000)
+            if course_id not in self.courses or s >= self.sessions:
+                return None
+            return {'session': self.__session(course_id, s)}
+        elif endpoint == 'weeklyFeedback':
+            course_id = body['courseId']
+            rng = self.__rng(endpoint, course_id)
+            steps = [{'stepNumber': '1', 'text': 'Overall, how satisfied are you with class this week? (1-10)'},
+                     {'stepNumber': '2', 'text': 'How well are you keeping up with the pace? (1-5)'},
+                     {'stepNumber': '3', 'text': 'Anything else you would like to share? (optional)'}]
+            date = self.__start(self.sessions // 2).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            submissions = [{'username': student, 'date': date,
+                            'answers': [{'answer': {'value': str(rng.randint(1, 10))}},
+                                        {'answer': {'value': str(rng.randint(1, 5))}},
+                                        {'answer': {'value': rng.choice(['N/A', 'none', 'More office hours please'])}}]}
+                           for student in self.__names(course_id)]
+            return {'surveyDefinition': {'steps': steps}, 'submissions': submissions}
+        return None
+
+    def __session(self, course_id: int, s: int) -> Dict:
+        start = self.__start(s)
+        info = {'id': course_id * 10000 + s, 'courseId': course_id, 'name': f"Session {s}",
+                'shortDescription': f"Session {s} of course {course_id}",
+                'longDescription': ('lorem ipsum ' * (self.description_size // 12 + 1))[:self.description_size],
+                'startTime': start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'endTime': (start + timedelta(hours=3)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'chapter': f"{s // 3 + 1}.{s % 3 + 1}"}
+        return {'session': info, 'context': {'contextCode': 'academic'}, 'classroom': None,
+                'videoUrlList': [f"https://video.local/{course_id}/{s}"]}
+
+    def __body(self, endpoint: str, body: Dict):
+        # Encoded once per request body and reused
+        key = _key(endpoint, body)
+        with self.__lock:
+            data = self.__bodies.get(key)
+        if data is None:
+            if self.__recorded:
+                payload = self.__recorded.get(key)
+            else:
+                payload = self.synthetic(endpoint, body)
+            if payload is None:
+                return None
+            data = json.dumps(payload).encode()
+            with self.__lock:
+                self.__bodies[key] = data
+        return data
+
+    def _answer(self, method: str, endpoint: str, token: str, body: Dict):
+        '''Returns ``(status, bytes)`` for a request'''
+        with self.__lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            failures = self.__failures.get(endpoint)
+            status = failures.pop(0) if failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if status is not None:
+            return status, b'{}'
+
+        if method == 'POST' and endpoint == 'login':
+            if self.password is not None and not body.get('password') == self.password:
+                return 401, b'{}'
+            return 200, json.dumps({'authenticationInfo': {'authToken': self.token}}).encode()
+        if not token == self.token:
+            return 401, b'{}'
+        if method == 'GET':
+            if endpoint == 'me':
+                return 200, json.dumps(self.__me).encode()
+            return 404, b'{}'
+        data = self.__body(endpoint, body)
+        return (404, b'{}') if data is None else (200, data)
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+                endpoint = self.path.rstrip('/').rsplit('/', 1)[-1]
+                status, data = server._answer(method, endpoint, self.headers.get('authToken'), body)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+        return Handler
+
+
+def record(path: str, email: str, password: str, courses: Iterable[int] = None,
+           endpoints: Iterable[str] = ('grades', 'attendance', 'sessions', 'feedback', 'session_closest'),
+           **kwargs):
+    """Records live responses for :meth:`StubServer.from_file` to replay.
+
+    Logs in, calls each endpoint for each course through a temporary cache and
+    writes every response it saw, along with the account's courses, to path.
+
+    Args:
+        path (str): JSON file to write
+        email (str): Bootcampspot login email
+        password (str): Bootcampspot login password
+        courses (iterable): courseIds to record, defaults to all of `my_courses`
+        endpoints (iterable): methods to call for each course
+
+    Keyword arguments are passed through to the Bootcampspot constructor.
+    """
+    from .bootcampspot import Bootcampspot
+
+    cache = MemoryCache(ttl=None, maxsize=float('inf'))
+    with Bootcampspot(email, password, cache=cache, **kwargs) as client:
+        sweep = client.sweep(endpoints=endpoints, courses=courses)
+        for errors in sweep.errors.values():
+            for error in errors.values():
+                raise error
+
+        me = {'userInfo': client.user,
+              'Enrollments': [{'id': course['enrollmentId'], 'courseId': course['courseId'],
+                               'course': {'name': course['courseName']}} for course in client.class_details]}
+    with open(path, 'w') as f:
+        json.dump({'me': me, 'responses': [list(item) for item in cache.items()]}, f)
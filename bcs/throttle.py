@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Callable, Dict, Tuple, Union
+
+Limit = Union[float, Tuple[float, float]]
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `burst`. Taking a
+    token when the bucket is empty blocks until one has refilled.
+
+    Args:
+        rate (float): tokens added per second
+        burst (float): bucket size, the most calls allowed back to back, at least 1, defaults to max(rate, 1)
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}. Must be greater than 0")
+        burst = burst if burst is not None else max(rate, 1)
+        if burst < 1:
+            # The bucket could never hold the token a call takes
+            raise ValueError(f"Invalid burst: {burst}. Must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.__tokens = self.burst
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Takes tokens, waiting for them to refill if needed.
+
+        Returns:
+            float: seconds spent waiting
+
+        Raises:
+            ValueError: more tokens than the bucket holds, which would wait forever
+        """
+        if tokens > self.burst:
+            raise ValueError(f"Invalid tokens: {tokens}. Can't take more than the burst of {self.burst}")
+        waited = 0.0
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+                self.__updated = now
+                if self.__tokens >= tokens:
+                    self.__tokens -= tokens
+                    return waited
+                wait = (tokens - self.__tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """Token buckets per endpoint.
+
+    A limit is either a rate in calls per second or a ``(rate, burst)`` pair.
+
+    Args:
+        limits (dict): ``{endpoint: limit}``
+        default (float or tuple): limit for endpoints not in `limits`, unlimited if None. All
+            such endpoints share one bucket, so it caps their combined rate.
+
+    Example:
+        >>> RateLimiter({'grades': (1, 3), 'attendance': 2}, default=(10, 20))
+    """
+
+    def __init__(self, limits: Dict[str, Limit] = None, default: Limit = None):
+        self.__buckets = {endpoint: self.__bucket(limit) for endpoint, limit in (limits or {}).items()}
+        self.__default = self.__bucket(default) if default is not None else None
+
+    @staticmethod
+    def __bucket(limit: Limit) -> TokenBucket:
+        if isinstance(limit, (tuple, list)):
+            return TokenBucket(*limit)
+        return TokenBucket(limit)
+
+    def acquire(self, endpoint: str) -> float:
+        '''Wait for a slot to call endpoint, returns the seconds waited'''
+        bucket = self.__buckets.get(endpoint, self.__default)
+        if bucket is None:
+            return 0.0
+        return bucket.acquire()
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one.
+
+    While a call for a key is in flight, other threads asking for the same
+    key wait for it and share its result (or its exception) instead of
+    making their own.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def do(self, key: str, fn: Callable) -> Tuple[object, bool]:
+        """Runs fn once for all concurrent callers with the same key.
+
+        Returns:
+            tuple: ``(result, shared)`` where shared is True for callers that waited on another's call
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
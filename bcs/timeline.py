@@ -0,0 +1,86 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def epoch(value) -> float:
+    """Converts a time to epoch seconds.
+
+    Args:
+        value: a datetime (naive ones are taken as UTC like the rest of the
+            wrapper), an ISO 8601 string with or without a trailing `Z`, or a number
+
+    Returns:
+        float: seconds since the epoch
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SessionIndex:
+    """Sessions sorted by start time for bisection lookups.
+
+    Start and end times are parsed once into arrays of epoch seconds, so
+    every lookup is O(log n) with no date parsing.
+
+    Args:
+        sessions (list): session records as returned by `Bootcampspot.sessions()`
+    """
+
+    def __init__(self, sessions: List[Dict]):
+        starts = [epoch(session['start_time']) for session in sessions]
+        order = sorted(range(len(sessions)), key=starts.__getitem__)
+        self.sessions = [sessions[i] for i in order]
+        self.starts = array('d', (starts[i] for i in order))
+        self.ends = array('d', (epoch(session['end_time']) for session in self.sessions))
+        # Latest end among sessions[:i+1], bounds how far back an overlap can reach
+        self.__reach = array('d')
+        for end in self.ends:
+            self.__reach.append(max(end, self.__reach[-1]) if self.__reach else end)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+    def closest(self, time) -> Optional[Dict]:
+        '''The session starting nearest to time, before or after'''
+        if not self.sessions:
+            return None
+        t = epoch(time)
+        i = bisect_left(self.starts, t)
+        if i == 0:
+            return self.sessions[0]
+        if i == len(self.starts):
+            return self.sessions[-1]
+        before, after = self.starts[i - 1], self.starts[i]
+        return self.sessions[i - 1] if t - before <= after - t else self.sessions[i]
+
+    def at(self, time) -> Optional[Dict]:
+        '''The session in progress at time, if any'''
+        t = epoch(time)
+        i = bisect_right(self.starts, t) - 1
+        # Walk back in case an earlier, longer session overlaps the latest start
+        while i >= 0 and self.__reach[i] > t:
+            if self.ends[i] > t:
+                return self.sessions[i]
+            i -= 1
+        return None
+
+    def between(self, start, end) -> List[Dict]:
+        '''Sessions starting in [start, end)'''
+        lo = bisect_left(self.starts, epoch(start))
+        hi = bisect_left(self.starts, epoch(end))
+        return self.sessions[lo:hi]
+
+    def next(self, time) -> Optional[Dict]:
+        '''The first session starting after time'''
+        i = bisect_right(self.starts, epoch(time))
+        return self.sessions[i] if i < len(self.sessions) else None
@@ -0,0 +1,51 @@
+from typing import Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BCS_ROOT = "https://bootcampspot.com/api/instructor/v1"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _retry(retries: int, backoff_factor: float, statuses: Iterable[int]) -> Retry:
+    # Every BCS endpoint is a read, including the POSTs, so all of them are
+    # safe to replay. urllib3 renamed `method_whitelist` in 1.26.
+    options = {'total': retries,
+               'backoff_factor': backoff_factor,
+               'status_forcelist': tuple(statuses),
+               'raise_on_status': False}
+    methods = frozenset(['GET', 'POST'])
+    try:
+        return Retry(allowed_methods=methods, **options)
+    except TypeError:
+        return Retry(method_whitelist=methods, **options)
+
+
+def build_session(pool_size: int = 10, retries: int = 3, backoff_factor: float = 0.5,
+                  statuses: Iterable[int] = RETRY_STATUSES, pool_block: bool = False) -> requests.Session:
+    """Builds a pooled, retrying session for talking to Bootcampspot.
+
+    Connections are kept alive and reused between calls so only the first
+    request to a host pays for the TCP and TLS handshakes.
+
+    Args:
+        pool_size (int): number of connections kept alive per host
+        retries (int): number of times a failed request is retried
+        backoff_factor (float): base of the exponential sleep between retries
+        statuses (iterable): status codes that trigger a retry
+        pool_block (bool): wait for a free connection instead of opening one past `pool_size`
+
+    Returns:
+        requests.Session: a session with the pooled adapter mounted for http and https
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size,
+                          pool_block=pool_block,
+                          max_retries=_retry(retries, backoff_factor, statuses))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
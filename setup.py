@@ -11,6 +11,15 @@ setup(
     keywords="Bootcampspot API Wrapper",
     url="https://github.com/Ouroboros-analytics/bcs-python",
     packages=find_packages("."),
+    extras_require={
+        "stream": ["ijson>=3.1"],
+        "pandas": ["pandas"],
+        "arrow": ["pyarrow"],
+        "analytics": ["numpy"],
+    },
+    entry_points={
+        "console_scripts": ["bcs=bcs.cli:main"],
+    },
     long_description="",
     classifiers=[
         "Development Status :: 3 - Alpha",
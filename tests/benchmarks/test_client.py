@@ -0,0 +1,83 @@
+"""Latency, throughput and memory benchmarks against the local stub server.
+
+Run with ``pytest tests/benchmarks --benchmark-only``, pytest-benchmark is
+required. Peak memory of each call is recorded in the benchmark's extra info.
+"""
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from bcs import Bootcampspot  # noqa: E402
+from bcs.testing import StubServer  # noqa: E402
+
+COHORT_SIZES = [30, 300, 3000]
+COURSES = 4
+
+METHODS = {
+    'grades': lambda bcs, course: bcs.grades(course),
+    'grades_columnar': lambda bcs, course: bcs.grades(course, output='columnar'),
+    'attendance': lambda bcs, course: bcs.attendance(course),
+    'attendance_columnar': lambda bcs, course: bcs.attendance(course, output='columnar'),
+    'iter_attendance': lambda bcs, course: sum(1 for _ in bcs.iter_attendance(course)),
+    'sessions': lambda bcs, course: bcs.sessions(course),
+    'session_closest': lambda bcs, course: bcs.session_closest(course),
+    'feedback': lambda bcs, course: bcs.feedback(course),
+}
+
+
+@pytest.fixture(scope='module', params=COHORT_SIZES, ids=lambda n: f"{n}-students")
+def server(request):
+    with StubServer(courses=COURSES, students=request.param) as server:
+        yield server
+
+
+@pytest.fixture(scope='module')
+def bcs(server):
+    with Bootcampspot('bench@bootcampspot.local', 'bench', bcs_root=server.url) as bcs:
+        yield bcs
+
+
+def peak_kib(fn, *args) -> float:
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def test_login(benchmark, server):
+    def login():
+        Bootcampspot('bench@bootcampspot.local', 'bench', bcs_root=server.url).close()
+    benchmark.group = 'login'
+    benchmark(login)
+
+
+@pytest.mark.parametrize('method', list(METHODS))
+def test_method_latency(benchmark, bcs, server, method):
+    call = METHODS[method]
+    course = server.courses[0]
+    benchmark.group = f"{method}"
+    benchmark.extra_info['students'] = server.students
+    benchmark.extra_info['peak_kib'] = peak_kib(call, bcs, course)
+    result = benchmark.pedantic(call, args=(bcs, course), rounds=5, warmup_rounds=1)
+    assert result
+
+
+@pytest.mark.parametrize('max_workers', [1, 8])
+def test_sweep_throughput(benchmark, bcs, server, max_workers):
+    endpoints = ['grades', 'attendance', 'sessions', 'feedback']
+    calls = len(endpoints) * len(server.courses)
+
+    def sweep():
+        return bcs.sweep(endpoints=endpoints, max_workers=max_workers)
+
+    benchmark.group = f"sweep-{server.students}-students"
+    benchmark.extra_info['calls'] = calls
+    benchmark.extra_info['peak_kib'] = peak_kib(sweep)
+    result = benchmark.pedantic(sweep, rounds=3, warmup_rounds=1)
+    if benchmark.stats is not None:
+        benchmark.extra_info['calls_per_second'] = calls / benchmark.stats.stats.mean
+    assert result.ok and len(result) == len(server.courses)
@@ -0,0 +1,24 @@
+"""Fixtures shared by the behaviour tests."""
+import pytest
+
+from bcs import Bootcampspot
+from bcs.testing import StubServer
+
+EMAIL = 'test@bootcampspot.local'
+PASSWORD = 'password'
+COURSE = 1000
+
+
+@pytest.fixture
+def server():
+    with StubServer(courses=2, students=5, assignments=4, sessions=6, password=PASSWORD) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    '''Builds clients of the stub server, or of another one passed as `server`, that don't back off between retries'''
+    def make(server=server, email=EMAIL, password=PASSWORD, **kwargs) -> Bootcampspot:
+        kwargs.setdefault('backoff_factor', 0)
+        return Bootcampspot(email, password, bcs_root=server.url, **kwargs)
+    return make
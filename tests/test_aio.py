@@ -0,0 +1,89 @@
+"""The asyncio client."""
+import asyncio
+import threading
+
+import pytest
+
+from bcs import AsyncBootcampspot
+from bcs.errors import BCSError
+
+from .conftest import EMAIL, PASSWORD
+
+
+class FakeClient:
+    """Answers grades and attendance for two courses, all four calls have to be in flight at once."""
+    my_courses = [1, 2]
+
+    def __init__(self):
+        self.barrier = threading.Barrier(4, timeout=5)
+        self.closed = False
+
+    def grades(self, course_id=None):
+        self.barrier.wait()
+        return {'course': course_id}
+
+    def attendance(self, course_id=None):
+        self.barrier.wait()
+        if course_id == 2:
+            raise BCSError('attendance is down')
+        return {}
+
+    def close(self):
+        self.closed = True
+
+
+def test_fetch_all_runs_calls_concurrently():
+    fake = FakeClient()
+
+    async def fetch():
+        async with AsyncBootcampspot(fake, max_concurrency=4) as bcs:
+            return await bcs.fetch_all(endpoints=['grades', 'attendance'])
+
+    sweep = asyncio.run(fetch())
+    assert sweep == {1: {'grades': {'course': 1}, 'attendance': {}}, 2: {'grades': {'course': 2}}}
+    assert isinstance(sweep.errors[2]['attendance'], BCSError)
+    assert fake.closed
+
+
+def test_fetch_all_collects_results_and_errors(server):
+    server.fail('attendance', 500)
+
+    async def fetch():
+        async with await AsyncBootcampspot.login(EMAIL, PASSWORD, bcs_root=server.url, retries=0) as bcs:
+            return await bcs.fetch_all(endpoints=['grades', 'attendance'])
+
+    sweep = asyncio.run(fetch())
+    assert sorted(sweep) == server.courses
+    # Calls run concurrently, so either course can get the failure
+    [failed] = sweep.errors
+    assert 'grades' in sweep[failed] and 'attendance' not in sweep[failed]
+
+
+def test_lazy_login_does_not_block_the_loop(server, client):
+    server.latency = 0.2
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def fetch():
+        ticker = asyncio.ensure_future(tick())
+        async with AsyncBootcampspot(client(lazy=True)) as bcs:
+            courses = await bcs.my_courses()
+        ticker.cancel()
+        return courses
+
+    assert asyncio.run(fetch()) == server.courses
+    assert len(ticks) > 10
+
+
+def test_only_cheap_attributes_pass_through(client):
+    bcs = AsyncBootcampspot(client())
+    assert bcs.stats() == {}
+    assert bcs.course is None
+    for name in ['sweep', 'snapshot', 'iter_grades', 'refresh', '_secret']:
+        with pytest.raises(AttributeError):
+            getattr(bcs, name)
+    bcs.close()
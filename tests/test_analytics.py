@@ -0,0 +1,60 @@
+"""Per-student grade and attendance metrics."""
+import math
+
+import pytest
+
+from bcs import analytics
+from bcs.errors import CourseError
+
+from .conftest import COURSE
+
+np = pytest.importorskip('numpy')
+
+GRADES = {1: [{'studentName': 'Ada', 'assignmentTitle': '1: Homework', 'grade': 'A'},
+              {'studentName': 'Ada', 'assignmentTitle': '2: Homework', 'grade': 'B'},
+              {'studentName': 'Ada', 'assignmentTitle': 'Milestone 1', 'grade': 'F'},
+              {'studentName': 'Bob', 'assignmentTitle': '1: Homework', 'grade': 'Unsubmitted'},
+              {'studentName': 'Bob', 'assignmentTitle': '2: Homework', 'grade': 'Unsubmitted'}],
+          2: [{'studentName': 'Ada', 'assignmentTitle': '1: Homework', 'grade': None}]}
+
+ATTENDANCE = {1: [{'studentName': 'Ada', 'sessionName': '1.1', 'present': True, 'remote': False, 'excused': None},
+                  {'studentName': 'Ada', 'sessionName': '1.2', 'present': False, 'remote': True, 'excused': None},
+                  {'studentName': 'Bob', 'sessionName': '1.1', 'present': False, 'remote': False, 'excused': False},
+                  {'studentName': 'Bob', 'sessionName': '1.2', 'present': False, 'remote': False, 'excused': True}]}
+
+
+def test_metrics_are_kept_per_course_and_student():
+    metrics = analytics.student_metrics(GRADES, ATTENDANCE, output='records')
+    by_student = {(row['course'], row['student']): row for row in metrics}
+    assert list(by_student) == [(1, 'Ada'), (1, 'Bob'), (2, 'Ada')]
+
+    ada, bob, other = by_student.values()
+    assert (ada['average'], ada['graded'], ada['missing']) == (3.5, 2, 0)
+    assert (ada['sessions'], ada['absences'], ada['at_risk']) == (2, 0, False)
+    assert (bob['average'], bob['missing'], bob['absences'], bob['absence_rate']) == (0.0, 2, 1, 0.5)
+    assert bob['at_risk']
+    # Nothing graded or recorded yet is NaN, which never flags a student
+    assert math.isnan(other['average']) and math.isnan(other['absence_rate'])
+    assert not other['at_risk']
+
+
+def test_thresholds_and_milestones_are_configurable():
+    metrics = analytics.student_metrics(GRADES[1], milestones=True, min_average=3.0, max_missing=5)
+    assert list(metrics['student']) == ['Ada', 'Bob']
+    assert metrics['average'][0] == pytest.approx(7 / 3)
+    assert metrics['at_risk'].tolist() == [True, True]
+    with pytest.raises(ValueError):
+        analytics.student_metrics(GRADES, output='dict')
+
+
+def test_cohort_metrics_cover_every_course(server, client):
+    metrics = client().cohort_metrics()
+    assert set(metrics['course']) == set(server.courses)
+    assert len(metrics['student']) == 2 * 5
+    assert metrics['sessions'].max() <= 6
+
+
+def test_cohort_metrics_rejects_unknown_courses(server, client):
+    with pytest.raises(CourseError):
+        client().cohort_metrics(courses=[COURSE, 9999])
+    assert 'grades' not in server.counts
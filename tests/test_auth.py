@@ -0,0 +1,89 @@
+"""Persisted auth tokens."""
+import json
+import os
+import time
+
+import pytest
+
+from bcs import FileTokenStore, MemoryTokenStore
+from bcs.errors import BCSError
+
+from .conftest import COURSE
+
+USER = 'ada@bootcampspot.local'
+SECRET = 'secret'
+ROOT = 'http://127.0.0.1:1/api'
+
+
+@pytest.fixture(params=['memory', 'file'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryTokenStore()
+    return FileTokenStore(str(tmp_path / 'tokens.json'))
+
+
+def test_load_returns_what_was_saved(store):
+    store.save(USER, SECRET, 'token', {'userInfo': {}}, bcs_root=ROOT)
+    entry = store.load(USER.upper(), SECRET, bcs_root=ROOT)
+    assert (entry['authToken'], entry['me']) == ('token', {'userInfo': {}})
+
+
+def test_tokens_need_the_same_password_and_root(store):
+    store.save(USER, SECRET, 'token', bcs_root=ROOT)
+    assert store.load(USER, 'wrong', bcs_root=ROOT) is None
+    assert store.load(USER, SECRET) is None
+    assert store.load('other@bootcampspot.local', SECRET, bcs_root=ROOT) is None
+
+
+def test_stale_and_cleared_tokens_are_not_loaded(store):
+    store.max_age = 0.05
+    store.save(USER, SECRET, 'token', bcs_root=ROOT)
+    time.sleep(0.1)
+    assert store.load(USER, SECRET, bcs_root=ROOT) is None
+    store.max_age = None
+    assert store.load(USER, SECRET, bcs_root=ROOT)
+    store.clear(USER, bcs_root=ROOT)
+    assert store.load(USER, SECRET, bcs_root=ROOT) is None
+
+
+def test_file_store_keeps_no_password_and_is_private(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    FileTokenStore(path).save(USER, SECRET, 'token', bcs_root=ROOT)
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    with open(path) as f:
+        assert SECRET not in json.dumps(json.load(f))
+    assert FileTokenStore(path).load(USER, SECRET, bcs_root=ROOT)['authToken'] == 'token'
+
+
+def test_clients_reuse_a_stored_token(server, client):
+    store = MemoryTokenStore()
+    client(token_store=store)
+    bcs = client(token_store=store)
+    assert bcs.my_courses == server.courses
+    assert server.counts['login'] == 1
+    assert server.counts['me'] == 1
+
+
+def test_wrong_password_logs_in_and_fails(server, client):
+    store = MemoryTokenStore()
+    client(token_store=store)
+    with pytest.raises(BCSError):
+        client(password='wrong', token_store=store)
+    assert server.counts['login'] == 2
+
+
+def test_logs_in_again_on_401(server, client):
+    bcs = client()
+    bcs.grades(COURSE)
+    server.expire_token()
+    assert bcs.grades(COURSE)
+    assert server.counts['login'] == 2
+    assert server.counts['grades'] == 3
+
+
+def test_lazy_client_saves_its_token(server, client):
+    store = MemoryTokenStore()
+    client(token_store=store, lazy=True).grades(COURSE)
+    client(token_store=store, lazy=True).grades(COURSE)
+    assert server.counts['login'] == 1
+    assert 'me' not in server.counts
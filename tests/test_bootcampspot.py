@@ -0,0 +1,153 @@
+"""Behaviour of the client against the local stub server."""
+import time
+
+import pytest
+import requests
+
+from bcs import Bootcampspot, IncrementalSync, MemoryCache, MemoryTokenStore, SqliteCache
+from bcs.errors import BCSError, SnapshotError
+from bcs.sync import Snapshot, diff
+from bcs.testing import StubServer
+
+from .conftest import COURSE, EMAIL, PASSWORD
+
+
+def test_retries_429_and_5xx(server, client):
+    bcs = client()
+    server.fail('grades', 429, 503)
+    assert bcs.grades(COURSE)
+    assert server.counts['grades'] == 3
+    assert bcs.stats()['grades']['status'] == {200: 1}
+
+
+def test_refresh_raises_once_retries_run_out(server, client):
+    bcs = client(retries=1, cache=MemoryCache())
+    server.fail('grades', 500, 500)
+    with pytest.raises(BCSError):
+        bcs.refresh('grades', COURSE)
+    assert server.counts['grades'] == 2
+    assert bcs.stats()['grades']['errors'] == 1
+
+
+def test_cache_serves_repeat_calls(server, client):
+    bcs = client(cache=MemoryCache())
+    assert bcs.grades(COURSE) == bcs.grades(COURSE)
+    assert server.counts['grades'] == 1
+    stats = bcs.stats()['grades']
+    assert (stats['cache_hits'], stats['cache_misses']) == (1, 1)
+
+
+def test_cache_entries_expire(server, client):
+    bcs = client(cache=MemoryCache(ttl=0.05))
+    bcs.grades(COURSE)
+    time.sleep(0.1)
+    bcs.grades(COURSE)
+    assert server.counts['grades'] == 2
+
+
+def test_cache_evicts_least_recently_used(server, client):
+    bcs = client(cache=MemoryCache(maxsize=1))
+    bcs.grades(1000)
+    bcs.grades(1001)
+    bcs.grades(1000)
+    assert server.counts['grades'] == 3
+
+
+def test_invalidate_drops_only_matching_responses(server, client):
+    bcs = client(cache=MemoryCache())
+    bcs.grades(1000)
+    bcs.grades(1001)
+    assert bcs.invalidate('grades', body={'courseId': 1000}) == 1
+    bcs.grades(1000)
+    bcs.grades(1001)
+    assert server.counts['grades'] == 3
+
+
+def test_shared_cache_keeps_accounts_apart(server, tmp_path, client):
+    path = str(tmp_path / 'cache.db')
+    first = client(cache=SqliteCache(path))
+    second = client(email='other@bootcampspot.local', cache=SqliteCache(path))
+    first.grades(COURSE)
+    second.grades(COURSE)
+    assert server.counts['grades'] == 2
+    assert second.invalidate() == 1
+    first.grades(COURSE)
+    assert server.counts['grades'] == 2
+
+
+def test_stream_records_bytes_and_transfer(server, client):
+    bcs = client()
+    assert list(bcs.iter_grades(COURSE))
+    stats = bcs.stats()['grades']
+    assert stats['bytes'] > 0
+    assert {'ttfb', 'transfer'} <= set(stats['timers'])
+
+
+def test_connection_errors_count_and_reach_hooks(server):
+    store = MemoryTokenStore()
+    store.save(EMAIL, PASSWORD, server.token, bcs_root='http://127.0.0.1:9')
+    bcs = Bootcampspot(EMAIL, PASSWORD, bcs_root='http://127.0.0.1:9', retries=0, timeout=1,
+                       token_store=store, lazy=True)
+    seen = []
+    bcs.add_hook('post_request', lambda endpoint, body, response, timings: seen.append((endpoint, response)))
+    with pytest.raises(requests.ConnectionError):
+        bcs.grades(COURSE)
+    assert seen == [('grades', None)]
+    assert bcs.stats()['grades']['errors'] == 1
+
+
+def test_session_index_expires_without_a_cache(server, client):
+    bcs = client(sessions_ttl=0.05)
+    bcs.next_session(COURSE)
+    bcs.session_at(course_id=COURSE)
+    assert server.counts['sessions'] == 1
+    time.sleep(0.1)
+    bcs.next_session(COURSE)
+    assert server.counts['sessions'] == 2
+
+
+def test_snapshot_round_trip(server, tmp_path, client):
+    bcs = client()
+    path = str(tmp_path / 'courses.bcs')
+    bcs.export_snapshot(path, courses=[COURSE], endpoints=['grades', 'attendance'], session_details=True)
+
+    offline = Bootcampspot.load_snapshot(path)
+    assert offline.my_courses == bcs.my_courses
+    assert offline.grades(COURSE) == bcs.grades(COURSE)
+    assert offline.attendance(COURSE, output='records') == bcs.attendance(COURSE, output='records')
+    assert offline.session_closest(COURSE) == bcs.session_closest(COURSE)
+    with pytest.raises(SnapshotError):
+        offline.feedback(COURSE)
+
+
+def test_diff_reports_added_changed_and_removed():
+    since = Snapshot('grades', 1, {('Ada', 'HW 1'): 'A', ('Ada', 'HW 2'): 'B', ('Bob', 'HW 1'): 'C'})
+    snapshot = Snapshot('grades', 1, {('Ada', 'HW 1'): 'A', ('Ada', 'HW 2'): 'A', ('Cy', 'HW 1'): 'B'})
+    changes = diff(since, snapshot)
+    assert changes.added == {('Cy', 'HW 1'): 'B'}
+    assert changes.changed == {('Ada', 'HW 2'): ('B', 'A')}
+    assert changes.removed == {('Bob', 'HW 1'): 'C'}
+    assert len(changes) == 3
+    with pytest.raises(ValueError):
+        diff(since, Snapshot('attendance', 1, {}))
+
+
+def test_changes_since_finds_regraded_cells(client):
+    with StubServer(courses=2, students=5, assignments=4, sessions=6, seed=1) as regraded:
+        since = client().snapshot('grades', COURSE)
+        changes = client(regraded).changes_since(since)
+    assert changes.changed
+    assert not changes.added and not changes.removed
+    assert changes.snapshot.course_id == COURSE
+
+
+def test_incremental_sync_reports_only_changes(server, tmp_path, client):
+    bcs = client(cache=MemoryCache())
+    bcs.grades(COURSE)
+    sync = IncrementalSync(bcs, path=str(tmp_path / 'sync.json'))
+    first = sync.pull('grades', COURSE)
+    assert len(first.added) == len(first.snapshot.cells) > 0
+    assert not IncrementalSync(bcs, path=str(tmp_path / 'sync.json')).pull('grades', COURSE)
+    # Snapshots refresh the cached response instead of dropping it
+    bcs.grades(COURSE)
+    assert server.counts['grades'] == 3
@@ -0,0 +1,110 @@
+"""Expiry, eviction and invalidation of the response caches."""
+import sqlite3
+import time
+
+import pytest
+
+from bcs.cache import MemoryCache, SqliteCache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'memory':
+            return MemoryCache(**kwargs)
+        return SqliteCache(str(tmp_path / 'cache.db'), **kwargs)
+    return make
+
+
+def test_get_returns_what_was_set(make_cache):
+    cache = make_cache()
+    assert cache.get('grades', {'courseId': 1}) == (False, None)
+    cache.set('grades', {'courseId': 1}, [{'grade': 'A'}])
+    assert cache.get('grades', {'courseId': 1}) == (True, [{'grade': 'A'}])
+
+
+def test_entries_expire_per_endpoint(make_cache):
+    cache = make_cache(ttl=60, ttls={'sessionDetail': 0.05, 'weeklyFeedback': 0})
+    cache.set('grades', {'courseId': 1}, 'grades')
+    cache.set('sessionDetail', {'sessionId': 1}, 'detail')
+    cache.set('weeklyFeedback', {'courseId': 1}, 'feedback')
+    time.sleep(0.1)
+    assert cache.get('grades', {'courseId': 1})[0]
+    assert not cache.get('sessionDetail', {'sessionId': 1})[0]
+    assert not cache.get('weeklyFeedback', {'courseId': 1})[0]
+
+
+def test_ttl_none_never_expires(make_cache):
+    cache = make_cache(ttl=0.05)
+    cache.set('sessionDetail', {'sessionId': 1}, 'detail', ttl=None)
+    time.sleep(0.1)
+    assert cache.get('sessionDetail', {'sessionId': 1}) == (True, 'detail')
+
+
+def test_least_recently_used_are_evicted(make_cache):
+    cache = make_cache(maxsize=2)
+    cache.set('grades', {'courseId': 1}, 1)
+    cache.set('grades', {'courseId': 2}, 2)
+    time.sleep(0.01)
+    cache.get('grades', {'courseId': 1})
+    cache.set('grades', {'courseId': 3}, 3)
+    assert len(cache) == 2
+    assert cache.get('grades', {'courseId': 1})[0]
+    assert not cache.get('grades', {'courseId': 2})[0]
+
+
+def test_invalidate_matches_endpoint_body_and_where(make_cache):
+    cache = make_cache()
+    for course_id in (1, 2):
+        cache.set('grades', {'courseId': course_id}, course_id)
+        cache.set('attendance', {'courseId': course_id}, course_id)
+    assert cache.invalidate('grades', body={'courseId': 1}) == 1
+    assert cache.invalidate(where=lambda endpoint, body: body['courseId'] == 2) == 2
+    assert [endpoint for endpoint, _, _ in cache.items()] == ['attendance']
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_namespaces_keep_entries_apart(make_cache):
+    cache = make_cache()
+    cache.set('grades', {'courseId': 1}, 'first', namespace='first')
+    cache.set('grades', {'courseId': 1}, 'second', namespace='second')
+    assert cache.get('grades', {'courseId': 1}, namespace='first') == (True, 'first')
+    assert not cache.get('grades', {'courseId': 1})[0]
+    assert list(cache.items(namespace='second')) == [('grades', {'courseId': 1}, 'second')]
+    assert cache.invalidate(namespace='first') == 1
+    assert cache.get('grades', {'courseId': 1}, namespace='second') == (True, 'second')
+
+
+def test_sqlite_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SqliteCache(path).set('grades', {'courseId': 1}, [{'grade': 'A'}])
+    assert SqliteCache(path).get('grades', {'courseId': 1}) == (True, [{'grade': 'A'}])
+
+
+def test_stored_changes_only_when_a_response_is_stored(make_cache):
+    cache = make_cache(ttl=0.05)
+    assert cache.stored('sessions', {'enrollmentId': 1}) is None
+    cache.set('sessions', {'enrollmentId': 1}, 'sessions')
+    stored = cache.stored('sessions', {'enrollmentId': 1})
+    cache.get('sessions', {'enrollmentId': 1})
+    assert cache.stored('sessions', {'enrollmentId': 1}) == stored
+    cache.set('sessions', {'enrollmentId': 1}, 'sessions')
+    assert cache.stored('sessions', {'enrollmentId': 1}) > stored
+    time.sleep(0.1)
+    assert cache.stored('sessions', {'enrollmentId': 1}) is None
+
+
+def test_sqlite_cache_upgrades_older_files(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    db = sqlite3.connect(path)
+    db.execute('''CREATE TABLE responses (key TEXT PRIMARY KEY, endpoint TEXT, body TEXT,
+                                          value TEXT, expires REAL, used REAL)''')
+    db.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+               (SqliteCache.key('grades', {'courseId': 1}), 'grades', '{"courseId": 1}', '"grades"', None, 1.0))
+    db.commit()
+    db.close()
+    cache = SqliteCache(path)
+    assert cache.stored('grades', {'courseId': 1}) == 1.0
+    cache.set('grades', {'courseId': 2}, 'grades')
+    assert cache.get('grades', {'courseId': 2}) == (True, 'grades')
@@ -0,0 +1,52 @@
+"""Resumable exports with the ``bcs`` command."""
+import csv
+import os
+
+from bcs.cli import CHECKPOINT, export, main
+
+from .conftest import EMAIL, PASSWORD
+
+ENDPOINTS = ['grades', 'attendance']
+
+
+def rows(path: str):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_rerun_resumes_after_failed_jobs(server, client, tmp_path):
+    out = str(tmp_path)
+    bcs = client(retries=0)
+    # One worker runs jobs in order, so the first attendance job gets the failure
+    server.fail('attendance', 500)
+    first = export(bcs, out, endpoints=ENDPOINTS, workers=1, log=open(os.devnull, 'w'))
+    assert list(first['failed']) == ['attendance/1000.csv']
+    assert (first['jobs'], first['skipped']) == (4, 0)
+    assert not os.path.exists(os.path.join(out, 'attendance', '1000.csv.part'))
+
+    second = export(bcs, out, endpoints=ENDPOINTS, workers=1, log=open(os.devnull, 'w'))
+    assert (second['jobs'], second['skipped'], second['failed']) == (1, 3, {})
+    assert server.counts['grades'] == 2
+    assert len(rows(os.path.join(out, 'attendance', '1000.csv'))) == second['rows'] > 0
+
+
+def test_deleted_files_are_exported_again(client, tmp_path):
+    out = str(tmp_path)
+    bcs = client()
+    export(bcs, out, endpoints=['grades'], log=open(os.devnull, 'w'))
+    os.remove(os.path.join(out, 'grades', '1001.csv'))
+    summary = export(bcs, out, endpoints=['grades'], log=open(os.devnull, 'w'))
+    assert (summary['jobs'], summary['skipped']) == (1, 1)
+
+
+def test_main_restart_ignores_the_checkpoint(server, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('BCS_EMAIL', EMAIL)
+    monkeypatch.setenv('BCS_PASSWORD', PASSWORD)
+    argv = ['--bcs-root', server.url, 'export', '--courses', '1000', '--endpoints', 'grades',
+            '--out', str(tmp_path), '--workers', '2']
+    assert main(argv) == 0
+    assert os.path.exists(os.path.join(str(tmp_path), CHECKPOINT))
+    assert main(argv) == 0
+    assert 'Skipped 1 finished' in capsys.readouterr().out
+    assert main(argv + ['--restart']) == 0
+    assert server.counts['grades'] == 2
@@ -0,0 +1,67 @@
+"""Weekly feedback surveys and their history."""
+import pytest
+
+from bcs import FeedbackHistory
+from bcs.feedback import FeedbackEngine, normalize, to_dict, week_of
+
+from .conftest import COURSE
+
+STEPS = [{'stepNumber': '2', 'text': 'How well are you keeping up with the pace? (1-5)'},
+         {'stepNumber': '1', 'text': 'Overall, how satisfied are you with class this week? (1-10)'}]
+
+RESPONSE = {'surveyDefinition': {'steps': STEPS},
+            'submissions': [{'username': 'ada', 'date': '2020-01-08T10:00:00.000Z',
+                             'answers': [{'answer': {'value': '9'}}, {'answer': {'value': 'N/A '}}]},
+                            {'username': 'bob', 'date': '2020-01-09T10:00:00.000Z', 'answers': None}]}
+
+
+@pytest.mark.parametrize('answer, value', [({'answer': {'value': '9'}}, '9'), ({'answer': {'value': ' None'}}, None),
+                                           ({'answer': {'value': ''}}, None), ({'answer': None}, None),
+                                           ({'answer': {'value': 3}}, None), ({}, None)])
+def test_non_answers_are_none(answer, value):
+    assert normalize(answer) == value
+
+
+def test_columns_line_answers_up_with_questions_in_step_order():
+    columns = FeedbackEngine().columns(COURSE, RESPONSE)
+    assert columns == {'student': ['ada', 'bob'], 'date': ['2020-01-08', '2020-01-09'],
+                       'Overall, how satisfied are you with class this week?': ['9', None],
+                       'How well are you keeping up with the pace?': [None, None]}
+    assert FeedbackEngine(ignored={'9'}).columns(COURSE, RESPONSE)['How well are you keeping up with the pace?'] == \
+        ['N/A ', None]
+    assert to_dict(columns)['ada']['Overall, how satisfied are you with class this week?'] == '9'
+
+
+def test_surveys_are_compiled_once_per_definition():
+    engine = FeedbackEngine()
+    survey = engine.survey(COURSE, RESPONSE)
+    assert engine.survey(COURSE, {'surveyDefinition': {'steps': [dict(step) for step in STEPS]}}) is survey
+    changed = [dict(STEPS[0], text='Any questions? (optional)'), STEPS[1]]
+    assert engine.survey(COURSE, {'surveyDefinition': {'steps': changed}}) is not survey
+    assert engine.survey(COURSE + 1, RESPONSE) is not survey
+
+
+def test_survey_key_only_covers_step_numbers_and_texts():
+    engine = FeedbackEngine()
+    survey = engine.survey(COURSE, RESPONSE)
+    restyled = [dict(step, style='stars') for step in STEPS]
+    assert engine.survey(COURSE, {'surveyDefinition': {'steps': restyled}}) is survey
+    assert survey.key == (('2', STEPS[0]['text']), ('1', STEPS[1]['text']))
+
+
+def test_history_stacks_pulled_weeks(client, tmp_path):
+    path = str(tmp_path / 'feedback.json')
+    history = FeedbackHistory(client(), path=path)
+    assert sorted(history.pull_all()) == [(COURSE, '2020-W02'), (COURSE + 1, '2020-W02')]
+    assert week_of('2020-01-12') == '2020-W02'
+
+    reopened = FeedbackHistory(client(), path=path)
+    assert reopened.weeks(COURSE) == [(COURSE, '2020-W02')]
+    table = reopened.query(courses=[COURSE], since='2020-W01', output='records')
+    assert len(table) == 5
+    assert {row['course'] for row in table} == {COURSE}
+    assert set(table[0]) == {'course', 'week', 'student', 'date', 'Overall, how satisfied are you with class this week?',
+                             'How well are you keeping up with the pace?', 'Anything else you would like to share?'}
+    assert reopened.query(until='2020-W01')['student'] == []
+    with pytest.raises(ValueError):
+        reopened.query(output='dict')
@@ -0,0 +1,80 @@
+"""Looking courses up by courseId, enrollmentId and cohort."""
+import pytest
+
+from bcs.errors import CourseError, EnrollmentError
+from bcs.index import CourseIndex
+from bcs.testing import StubServer
+
+from .conftest import COURSE
+
+DETAILS = [{'courseName': 'COHORT-MW', 'courseId': 1, 'enrollmentId': 10},
+           {'courseName': 'COHORT-TTH', 'courseId': 2, 'enrollmentId': 10},
+           {'courseName': 'OTHER-MW', 'courseId': 3, 'enrollmentId': 30}]
+
+
+@pytest.fixture
+def index():
+    return CourseIndex(DETAILS)
+
+
+def test_ids_map_to_their_records(index):
+    assert len(index) == 3
+    assert index.course(2) is DETAILS[1]
+    assert index.enrollment(10) == DETAILS[:2]
+    assert index.cohort('OTHER-MW') is DETAILS[2]
+
+
+@pytest.mark.parametrize('lookup, error', [('course', CourseError), ('enrollment', EnrollmentError),
+                                           ('cohort', CourseError)])
+def test_unknown_ids_raise(index, lookup, error):
+    with pytest.raises(error):
+        getattr(index, lookup)(99)
+    with pytest.raises(error):
+        getattr(index, lookup)([1])
+
+
+def test_lookup_matches_every_id_given(index):
+    assert index.lookup() == DETAILS
+    assert index.lookup(enrollment=10) == DETAILS[:2]
+    assert index.lookup(course=2, enrollment=10) == [DETAILS[1]]
+    assert index.lookup(cohort='COHORT-MW', enrollment=10) == [DETAILS[0]]
+    with pytest.raises(CourseError):
+        index.lookup(course=1, enrollment=30)
+    with pytest.raises(CourseError):
+        index.lookup(course=1, cohort='OTHER-MW')
+
+
+def test_client_lookup_uses_the_course_index(client):
+    bcs = client()
+    assert [record['courseId'] for record in bcs.lookup(enrollment=5000)] == [COURSE, COURSE + 1]
+    assert bcs.lookup(cohort='STUB-COHORT-00-TTH')[0]['courseId'] == COURSE + 1
+    with pytest.raises(EnrollmentError):
+        bcs.lookup(enrollment=1)
+
+
+def test_setting_a_course_sets_its_enrollment(client):
+    bcs = client()
+    bcs.course = COURSE + 1
+    assert bcs.enrollment == 5000
+    # A course set earlier doesn't pin the enrollment of the next one
+    bcs.course = COURSE
+    assert bcs.course == COURSE
+    with pytest.raises(CourseError):
+        bcs.course = 9999
+    assert bcs.course == COURSE
+
+
+def test_enrollment_and_course_must_match(client):
+    with StubServer(courses=4) as server:
+        bcs = client(server)
+        bcs.course = COURSE + 2
+        with pytest.raises(EnrollmentError):
+            bcs.enrollment = 5000
+        bcs.enrollment = 5001
+
+        bcs = client(server)
+        bcs.enrollment = 5001
+        with pytest.raises(CourseError):
+            bcs.course = COURSE
+        bcs.course = COURSE + 3
+        assert bcs.enrollment == 5001
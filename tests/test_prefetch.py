@@ -0,0 +1,38 @@
+"""Keeping the response cache warm in the background."""
+import time
+
+import pytest
+
+from bcs import MemoryCache, Prefetcher
+
+
+def test_rounds_refresh_every_course(server, client):
+    bcs = client(cache=MemoryCache(ttl=60))
+    with bcs.prefetch(endpoints=['grades', 'attendance'], interval=0.05, jitter=0) as prefetcher:
+        time.sleep(0.2)
+    assert prefetcher.rounds >= 2
+    assert not prefetcher.last.errors
+    assert server.counts['grades'] == server.counts['attendance'] == 2 * prefetcher.rounds
+    bcs.grades(1000)
+    assert server.counts['grades'] == 2 * prefetcher.rounds
+
+
+def test_failed_refreshes_are_reported(server, client):
+    errors = []
+    bcs = client(cache=MemoryCache(ttl=60), retries=0)
+    server.fail('grades', 500)
+    result = Prefetcher(bcs, endpoints=['grades'], courses=[1000],
+                        on_error=lambda *error: errors.append(error[:2])).run_once()
+    assert list(result.errors) == [1000]
+    assert errors == [(1000, 'grades')]
+
+
+def test_rounds_must_fit_in_the_cache_ttl(client):
+    bcs = client(cache=MemoryCache(ttl=60, ttls={'weeklyFeedback': 0}))
+    assert Prefetcher(bcs, endpoints=['grades']).interval == 30
+    with pytest.raises(ValueError):
+        Prefetcher(bcs, endpoints=['grades'], interval=60)
+    with pytest.raises(ValueError):
+        Prefetcher(bcs, endpoints=['feedback'])
+    with pytest.raises(ValueError):
+        Prefetcher(client(), endpoints=['grades'])
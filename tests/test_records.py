@@ -0,0 +1,34 @@
+"""Compact NamedTuple records."""
+from bcs.records import AttendanceRecord, GradeRecord, from_columns, session_record
+
+from .conftest import COURSE
+
+
+def test_records_share_interned_strings():
+    # Built at runtime so the two names start out as separate objects
+    names = ['Student ' + str(n) for n in (1, 1)]
+    assert names[0] is not names[1]
+    records = from_columns({'student': names, 'assignment': ['1: Homework'] * 2, 'grade': ['A', None]},
+                           GradeRecord)
+    assert records == [GradeRecord('Student 1', '1: Homework', 'A'), GradeRecord('Student 1', '1: Homework', None)]
+    assert records[0].student is records[1].student
+    assert not hasattr(records[0], '__dict__')
+
+
+def test_session_record_keeps_every_field():
+    session = {'id': 1, 'name': 'Session 1', 'short_description': '', 'long_description': '',
+               'start_time': '2020-01-06T23:00:00', 'end_time': '2020-01-07T02:00:00', 'chapter': '1.1',
+               'context': 'academic', 'classroom': None, 'video_url_list': None}
+    record = session_record(session)
+    assert record._asdict() == dict(session, video_url_list=())
+
+
+def test_compact_output_matches_the_records_output(client):
+    bcs = client()
+    grades = bcs.grades(COURSE, output='compact')
+    assert [record._asdict() for record in grades] == bcs.grades(COURSE, output='records')
+    attendance = bcs.attendance(COURSE, output='compact')
+    assert all(isinstance(record, AttendanceRecord) for record in attendance)
+    assert [record._asdict() for record in attendance] == bcs.attendance(COURSE, output='records')
+    sessions = bcs.sessions(COURSE, output='compact')
+    assert [session.id for session in sessions] == [session['id'] for session in bcs.sessions(COURSE)]
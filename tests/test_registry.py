@@ -0,0 +1,58 @@
+"""Sharing logged in clients between requests."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bcs import ClientRegistry, MemoryCache, MemoryTokenStore
+from bcs.errors import BCSError
+
+from .conftest import EMAIL, PASSWORD
+
+
+def test_concurrent_first_requests_share_one_login(server):
+    with ClientRegistry(bcs_root=server.url) as registry:
+        with ThreadPoolExecutor(16) as pool:
+            clients = list(pool.map(lambda _: registry.get(EMAIL, PASSWORD), range(32)))
+        assert len({id(client) for client in clients}) == 1
+        assert server.counts['login'] == 1
+        assert registry.stats()['misses'] == 1
+
+
+def test_clients_are_keyed_by_password(server):
+    with ClientRegistry(bcs_root=server.url) as registry:
+        first = registry.get(EMAIL, PASSWORD)
+        with pytest.raises(BCSError):
+            registry.get(EMAIL, 'wrong')
+        assert registry.evict(EMAIL) == 1
+        assert registry.get(EMAIL, PASSWORD) is not first
+
+
+def test_token_store_never_serves_a_wrong_password(server):
+    with ClientRegistry(bcs_root=server.url, token_store=MemoryTokenStore()) as registry:
+        registry.get(EMAIL, PASSWORD).grades(1000)
+        with pytest.raises(BCSError):
+            registry.get(EMAIL, 'wrong')
+        assert server.counts['login'] == 2
+        assert registry.stats()['clients'] == 1
+
+
+def test_least_recently_used_and_idle_clients_are_dropped(server):
+    with ClientRegistry(maxsize=2, ttl=0.2, bcs_root=server.url) as registry:
+        first = registry.get('first@bootcampspot.local', PASSWORD)
+        registry.get('second@bootcampspot.local', PASSWORD)
+        registry.get('first@bootcampspot.local', PASSWORD)
+        registry.get('third@bootcampspot.local', PASSWORD)
+        assert registry.get('first@bootcampspot.local', PASSWORD) is first
+        assert registry.stats()['evictions'] == 1
+        time.sleep(0.25)
+        assert registry.expire() == 2
+        assert len(registry) == 0
+
+
+def test_dropping_a_client_stops_its_prefetcher(server):
+    with ClientRegistry(bcs_root=server.url, cache=lambda: MemoryCache(ttl=60)) as registry:
+        client = registry.get(EMAIL, PASSWORD)
+        prefetcher = client.prefetch(endpoints=['grades'], courses=[1000])
+        registry.clear()
+        assert not prefetcher.running
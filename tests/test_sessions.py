@@ -0,0 +1,60 @@
+"""Fetching the details of many sessions."""
+import time
+
+from bcs import MemoryCache
+
+from .conftest import COURSE
+
+SESSIONS = [COURSE * 10000 + s for s in range(6)]
+
+
+class CountingCache(MemoryCache):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writes = 0
+
+    def set(self, *args, **kwargs):
+        self.writes += 1
+        super().set(*args, **kwargs)
+
+
+def test_duplicate_ids_are_fetched_once(server, client):
+    details = client().session_details_many(SESSIONS[:3] * 2)
+    assert list(details) == SESSIONS[:3]
+    assert details[SESSIONS[1]]['session']['id'] == SESSIONS[1]
+    assert server.counts['sessionDetail'] == 3
+
+
+def test_details_are_fetched_concurrently(server, client):
+    server.latency = 0.2
+    bcs = client()
+    start = time.monotonic()
+    bcs.session_details_many(SESSIONS, max_concurrency=len(SESSIONS))
+    assert time.monotonic() - start < 0.2 * len(SESSIONS) / 2
+
+
+def test_past_sessions_are_reused_without_a_cache(server, client):
+    bcs = client()
+    bcs.session_details_many(SESSIONS)
+    bcs.session_details_many(SESSIONS)
+    assert server.counts['sessionDetail'] == len(SESSIONS)
+
+
+def test_past_sessions_are_only_written_when_fetched(server, client):
+    cache = CountingCache(ttl=0.05)
+    bcs = client(cache=cache)
+    bcs.session_details_many(SESSIONS)
+    writes = cache.writes
+    time.sleep(0.1)
+    for _ in range(5):
+        bcs.session_details_many(SESSIONS)
+    assert cache.writes == writes
+    assert server.counts['sessionDetail'] == len(SESSIONS)
+    assert bcs.stats()['sessionDetail']['cache_hits'] == 5 * len(SESSIONS)
+
+
+def test_zero_session_detail_ttl_is_honoured(server, client):
+    bcs = client(cache=MemoryCache(ttl=60, ttls={'sessionDetail': 0}))
+    bcs.session_details_many(SESSIONS)
+    bcs.session_details_many(SESSIONS)
+    assert server.counts['sessionDetail'] == 2 * len(SESSIONS)
@@ -0,0 +1,57 @@
+"""Fetching many courses at once."""
+import threading
+
+import pytest
+
+from bcs.errors import BCSError
+from bcs.sweep import SweepResult, _fan_out, check_endpoints
+
+from .conftest import COURSE
+
+
+def test_failed_calls_are_collected_apart_from_results():
+    result = SweepResult()
+    result.add(1, 'grades', {'a': 1})
+    error = BCSError('down')
+    result.add(1, 'attendance', error)
+    assert result == {1: {'grades': {'a': 1}}}
+    assert result.errors == {1: {'attendance': error}}
+    assert not result.ok
+
+
+def test_endpoints_are_checked():
+    assert check_endpoints('grades,sessions') == ['grades', 'sessions']
+    with pytest.raises(ValueError):
+        check_endpoints(['grades', 'iter_grades'])
+
+
+def test_sweep_keeps_going_past_failed_calls(server, client):
+    bcs = client(retries=0)
+    server.fail('attendance', 500)
+    result = bcs.sweep(endpoints=['grades', 'attendance'], max_workers=1)
+    assert sorted(result) == server.courses
+    assert list(result.errors) == [COURSE]
+    assert list(result.errors[COURSE]) == ['attendance']
+    assert result[COURSE]['grades'] == bcs.grades(COURSE)
+    assert set(result[COURSE + 1]) == {'grades', 'attendance'}
+
+
+def test_fan_out_keeps_job_order_and_runs_concurrently():
+    barrier = threading.Barrier(4, timeout=5)
+
+    def call(a, b):
+        barrier.wait()
+        return a + b
+
+    assert _fan_out(call, [(i, 1) for i in range(4)], max_workers=4) == [1, 2, 3, 4]
+
+
+def test_fan_out_raises_or_returns_failures():
+    def call(n):
+        return 1 / n
+
+    with pytest.raises(ZeroDivisionError):
+        _fan_out(call, [(1,), (0,)], max_workers=2)
+    first, failed = _fan_out(call, [(1,), (0,)], max_workers=2, return_exceptions=True)
+    assert first == 1.0
+    assert isinstance(failed, ZeroDivisionError)
@@ -0,0 +1,57 @@
+"""Flat output formats for grades and attendance."""
+import pytest
+
+from bcs import tabular
+
+from .conftest import COURSE
+
+GRADES = [{'studentName': 'Ada', 'assignmentTitle': '1: Homework', 'grade': 'A'},
+          {'studentName': 'Bob', 'assignmentTitle': '1: Homework', 'grade': None},
+          {'studentName': 'Ada', 'assignmentTitle': 'Milestone 1', 'grade': 'B'},
+          {'studentName': 'Ada', 'assignmentTitle': '2: Homework', 'grade': None},
+          {'studentName': 'Bob', 'assignmentTitle': '2: Homework', 'grade': None}]
+
+ATTENDANCE = [{'studentName': 'Ada', 'sessionName': '1.1', 'present': True, 'remote': False, 'excused': None},
+              {'studentName': 'Ada', 'sessionName': '1.2', 'present': False, 'remote': False, 'excused': False},
+              {'studentName': 'Bob', 'sessionName': '1.1', 'present': False, 'remote': True, 'excused': None},
+              {'studentName': 'Cy', 'sessionName': '1.1', 'present': False, 'remote': False, 'excused': None}]
+
+
+def test_grade_columns_drop_milestones_and_unassigned_work():
+    assert tabular.grade_columns(GRADES) == {'student': ['Ada', 'Bob'],
+                                             'assignment': ['1: Homework', '1: Homework'],
+                                             'grade': ['A', None]}
+    assert len(tabular.grade_columns(GRADES, milestones=True)['grade']) == 3
+    assert len(tabular.grade_columns(GRADES, return_null=True)['grade']) == 4
+
+
+def test_attendance_columns_drop_students_without_a_status():
+    columns = tabular.attendance_columns(ATTENDANCE)
+    assert columns == {'student': ['Ada', 'Ada', 'Bob'], 'session': ['1.1', '1.2', '1.1'],
+                       'status': ['present', 'absent', 'remote']}
+    assert len(tabular.attendance_columns(ATTENDANCE, by='session')['status']) == 4
+
+
+def test_convert_builds_every_output():
+    columns = tabular.grade_columns(GRADES)
+    assert tabular.convert(columns, 'columnar') is columns
+    assert tabular.convert(columns, 'records') == [{'student': 'Ada', 'assignment': '1: Homework', 'grade': 'A'},
+                                                   {'student': 'Bob', 'assignment': '1: Homework', 'grade': None}]
+    pd = pytest.importorskip('pandas')
+    assert tabular.convert(columns, 'dataframe').equals(pd.DataFrame(columns))
+    with pytest.raises(ValueError):
+        tabular.convert(columns, 'xml')
+
+
+def test_flat_outputs_match_the_dict_output(client):
+    bcs = client()
+    grades = bcs.grades(COURSE)
+    rows = bcs.grades(COURSE, output='records')
+    assert {(row['assignment'], row['student']): row['grade'] for row in rows} == \
+        {(assignment, student): grade for assignment, students in grades.items()
+         for student, grade in students.items()}
+    attendance = bcs.attendance(COURSE, by='session')
+    columns = bcs.attendance(COURSE, by='session', output='columnar')
+    assert set(columns['session']) == set(attendance)
+    with pytest.raises(ValueError):
+        bcs.grades(COURSE, output='xml')
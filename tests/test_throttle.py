@@ -0,0 +1,105 @@
+"""Rate limiting and coalescing of API calls."""
+import threading
+import time
+
+import pytest
+
+from bcs import RateLimiter, TokenBucket
+from bcs.throttle import SingleFlight
+
+from .conftest import COURSE
+
+
+def test_bucket_allows_a_burst_then_paces_calls():
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.acquire() == bucket.acquire() == 0
+    start = time.monotonic()
+    assert bucket.acquire() > 0
+    assert 0.03 < time.monotonic() - start < 0.5
+
+
+@pytest.mark.parametrize('rate, burst', [(0, 1), (-1, None), (0.5, 0.5), (5, 0)])
+def test_bucket_rejects_limits_it_could_never_serve(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+
+
+def test_bucket_rejects_taking_more_than_its_burst():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=2).acquire(3)
+
+
+def test_limiter_keeps_a_bucket_per_endpoint():
+    limiter = RateLimiter({'grades': (10, 1)}, default=(10, 1))
+    assert limiter.acquire('grades') == 0
+    assert limiter.acquire('attendance') == 0
+    # Endpoints without their own limit share the default bucket
+    assert limiter.acquire('sessions') > 0
+    assert limiter.acquire('grades') == 0
+    assert RateLimiter().acquire('grades') == 0
+    with pytest.raises(ValueError):
+        RateLimiter({'grades': (0.5, 0.5)})
+
+
+def test_limiter_throttles_client_calls(server, client):
+    bcs = client(rate_limiter=RateLimiter({'grades': (5, 1)}))
+    for _ in range(3):
+        bcs.grades(COURSE)
+    throttle = bcs.stats()['grades']['timers']['throttle']
+    assert throttle['count'] == 2
+    assert throttle['total'] > 0.2
+
+
+def test_single_flight_shares_results_and_errors():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow():
+        started.set()
+        release.wait()
+        return 'result'
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lambda: results.append(flight.do('key', lambda: 'other')))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    assert sorted(results) == [('result', False), ('result', True)]
+
+    with pytest.raises(KeyError):
+        flight.do('key', lambda: {}['missing'])
+    assert flight.do('key', lambda: 'again') == ('again', False)
+
+
+def test_concurrent_identical_calls_share_one_request(server, client):
+    server.latency = 0.2
+    bcs = client()
+    barrier = threading.Barrier(8)
+
+    def call():
+        barrier.wait()
+        bcs.grades(COURSE)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.counts['grades'] == 1
+    assert bcs.stats()['grades']['coalesced'] == 7
+
+
+def test_coalescing_can_be_turned_off(server, client):
+    server.latency = 0.1
+    bcs = client(coalesce=False)
+    threads = [threading.Thread(target=bcs.grades, args=(COURSE,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.counts['grades'] == 4
@@ -0,0 +1,92 @@
+"""Looking sessions up by time."""
+from datetime import datetime
+
+import pytest
+
+from bcs import MemoryCache, SqliteCache
+from bcs.timeline import SessionIndex, epoch
+
+from .conftest import COURSE
+
+
+def session(id, start, end):
+    return {'id': id, 'start_time': start, 'end_time': end}
+
+
+@pytest.fixture
+def index():
+    # Out of order, with a long workshop overlapping the evening classes
+    return SessionIndex([session(3, '2020-01-08T19:00:00', '2020-01-08T22:00:00'),
+                         session(1, '2020-01-06T19:00:00', '2020-01-06T22:00:00'),
+                         session(2, '2020-01-08T09:00:00', '2020-01-08T21:00:00')])
+
+
+def ids(sessions):
+    return [session['id'] for session in sessions]
+
+
+def test_epoch_accepts_datetimes_strings_and_numbers():
+    assert epoch('2020-01-06T19:00:00Z') == epoch('2020-01-06T19:00:00') == epoch(datetime(2020, 1, 6, 19))
+    assert epoch(1578337200) == 1578337200.0
+
+
+def test_sessions_are_sorted_by_start(index):
+    assert ids(index) == [1, 2, 3]
+    assert len(index) == 3
+
+
+def test_at_finds_the_session_in_progress(index):
+    assert index.at('2020-01-06T20:00:00')['id'] == 1
+    assert index.at('2020-01-06T22:00:00') is None
+    assert index.at('2020-01-08T12:00:00')['id'] == 2
+    # Both are running, the one that started last wins
+    assert index.at('2020-01-08T20:00:00')['id'] == 3
+    assert index.at('2020-01-05T12:00:00') is None
+    assert SessionIndex([]).at('2020-01-06T20:00:00') is None
+
+
+def test_between_is_half_open(index):
+    assert ids(index.between('2020-01-06T19:00:00', '2020-01-08T19:00:00')) == [1, 2]
+    assert ids(index.between('2020-01-07', '2020-01-09')) == [2, 3]
+    assert index.between('2020-01-09', '2020-01-10') == []
+
+
+def test_next_is_the_first_session_to_start_after(index):
+    assert index.next('2020-01-01')['id'] == 1
+    assert index.next('2020-01-06T19:00:00')['id'] == 2
+    assert index.next('2020-01-08T19:00:00') is None
+
+
+def test_closest_looks_both_ways(index):
+    assert index.closest('2020-01-01')['id'] == 1
+    assert index.closest('2020-01-07T12:00:00')['id'] == 1
+    assert index.closest('2020-01-07T18:00:00')['id'] == 2
+    assert index.closest('2020-01-08T15:00:00')['id'] == 3
+    assert index.closest('2021-01-01')['id'] == 3
+    assert SessionIndex([]).closest('2020-01-01') is None
+
+
+def test_client_lookups_use_the_course_sessions(server, client):
+    bcs = client()
+    # Stub sessions start at 23:00 every other day from 2020-01-06 and last 3 hours
+    assert bcs.session_at('2020-01-07T01:00:00', course_id=COURSE)['name'] == 'Session 0'
+    assert bcs.session_at('2020-01-07T03:00:00', course_id=COURSE) is None
+    assert [s['name'] for s in bcs.sessions_between('2020-01-07', '2020-01-11', course_id=COURSE)] == \
+        ['Session 1', 'Session 2']
+    assert bcs.next_session(COURSE, time='2020-01-07')['name'] == 'Session 1'
+    assert server.counts['sessions'] == 1
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_index_is_rebuilt_only_when_the_cached_sessions_change(server, client, tmp_path, kind):
+    cache = MemoryCache() if kind == 'memory' else SqliteCache(str(tmp_path / 'cache.db'))
+    bcs = client(cache=cache)
+    index = bcs.session_index(COURSE)
+    assert bcs.session_index(COURSE) is index
+    assert bcs.stats()['sessions']['cache_hits'] == 0
+
+    bcs.invalidate('sessions')
+    rebuilt = bcs.session_index(COURSE)
+    assert rebuilt is not index
+    assert bcs.session_index(COURSE) is rebuilt
+    assert server.counts['sessions'] == 2
@@ -0,0 +1,60 @@
+"""The pooled, retrying HTTP session."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bcs.transport import build_session
+
+
+@pytest.fixture
+def flaky():
+    """A local server answering each request with the next queued status, 200 once they run out."""
+    statuses, seen, ports = [], [], set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def answer(self):
+            seen.append(self.command)
+            ports.add(self.client_address[1])
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        do_GET = do_POST = answer
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.statuses, server.seen, server.ports = statuses, seen, ports
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_posts_on_retry_statuses(flaky):
+    flaky.statuses += [503, 429]
+    response = build_session(retries=2, backoff_factor=0).post(flaky.url, json={'courseId': 1})
+    assert response.status_code == 200
+    assert flaky.seen == ['POST'] * 3
+
+
+def test_last_failure_is_returned_once_retries_run_out(flaky):
+    flaky.statuses += [500, 502]
+    assert build_session(retries=1, backoff_factor=0).get(flaky.url).status_code == 502
+    flaky.statuses += [404]
+    assert build_session(retries=3, backoff_factor=0).get(flaky.url).status_code == 404
+    assert len(flaky.seen) == 3
+
+
+def test_connections_are_kept_alive(flaky):
+    session = build_session(pool_size=1)
+    for _ in range(3):
+        session.get(flaky.url)
+    assert len(flaky.ports) == 1